@@ -3,6 +3,12 @@ module "azure" {
   count  = var.enable_azure ? 1 : 0
 }
 
+locals {
+  # Steer apex traffic away from the Google VM once it is projected to use up its egress allowance
+  gcp_egress             = var.enable_google && var.egress_steering.enable ? module.google[0].egress : null
+  gcp_over_egress_budget = try(local.gcp_egress.limit_bytes > 0 && local.gcp_egress.projected_bytes >= var.egress_steering.threshold * local.gcp_egress.limit_bytes, false)
+}
+
 module "cloudflare" {
   source = "./modules/cloudflare"
   count  = var.enable_cloudflare && var.cloudflare_config.domain != "" ? 1 : 0
@@ -16,6 +22,7 @@ module "cloudflare" {
         ipv4              = module.google[0].vm_ip_address != null ? module.google[0].vm_ip_address : ""
         ipv6_enabled      = false
         dns_tunnel_enable = var.dns_tunnel_config.enable
+        in_rotation       = !local.gcp_over_egress_budget
       }
     } : {},
     var.enable_oracle ? {
@@ -57,10 +64,12 @@ module "google" {
   https_proxy_secrets = merge(var.https_proxy_secrets, {
     external_key_pem = try(module.cloudflare[0].origin_private_key_pem, "")
   })
+  quic_proxy_config = var.quic_proxy_config
   ipsec_vpn_config  = var.ipsec_vpn_config
   ipsec_vpn_secrets = var.ipsec_vpn_secrets
   wireguard_config  = var.wireguard_config
   ssh_ports         = var.ssh_ports
+  read_egress_usage = var.egress_steering.enable
 }
 
 module "oracle" {
@@ -84,6 +93,7 @@ module "oracle" {
   https_proxy_secrets = merge(var.https_proxy_secrets, {
     external_key_pem = try(module.cloudflare[0].origin_private_key_pem, "")
   })
+  quic_proxy_config  = var.quic_proxy_config
   ipsec_vpn_config   = var.ipsec_vpn_config
   ipsec_vpn_secrets  = var.ipsec_vpn_secrets
   wireguard_config   = var.wireguard_config
@@ -1,5 +1,12 @@
 # DNS records for provider subdomains
 
+locals {
+  # Providers taken out of rotation (eg. over their egress budget) are left out of the apex records.
+  # Cloudflare's free plan has no weighted records, so this is all-or-nothing; never leave the apex empty though
+  rotation_hosts = { for k, v in var.provider_hosts : k => v if v.in_rotation }
+  apex_hosts     = length(local.rotation_hosts) > 0 ? local.rotation_hosts : var.provider_hosts
+}
+
 # Subdomain A records per enabled provider (e.g., gcp.example.com -> provider IPv4)
 resource "cloudflare_dns_record" "subdomain_a" {
   for_each = var.provider_hosts
@@ -14,7 +21,7 @@ resource "cloudflare_dns_record" "subdomain_a" {
 
 # Apex/root A records pointing to each provider IPv4 (round-robin at root)
 resource "cloudflare_dns_record" "root_a" {
-  for_each = var.provider_hosts
+  for_each = local.apex_hosts
 
   zone_id = data.cloudflare_zones.this.result[0].id
   name    = local.zone_name
@@ -50,7 +57,7 @@ resource "cloudflare_dns_record" "subdomain_aaaa" {
 
 # Apex/root AAAA records pointing to each IPv6-enabled provider
 resource "cloudflare_dns_record" "root_aaaa" {
-  for_each = { for k, v in var.provider_hosts : k => v if v.ipv6_enabled }
+  for_each = { for k, v in local.apex_hosts : k => v if v.ipv6_enabled }
 
   zone_id = data.cloudflare_zones.this.result[0].id
   name    = local.zone_name
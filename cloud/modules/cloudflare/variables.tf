@@ -16,12 +16,13 @@ variable "config" {
 }
 
 variable "provider_hosts" {
-  description = "Map of provider labels to settings for DNS records (ipv4/ipv6 and whether dns_tunnel is enabled on that provider). Keys are provider labels like 'gcp' or 'oci'. Presence implies enabled."
+  description = "Map of provider labels to settings for DNS records (ipv4/ipv6 and whether dns_tunnel is enabled on that provider). Keys are provider labels like 'gcp' or 'oci'. Presence implies enabled. in_rotation=false keeps the provider out of the apex round-robin records (eg. when it is close to its egress allowance)."
   type = map(object({
     ipv4              = string
     ipv6              = optional(string, null)
     ipv6_enabled      = optional(bool, false)
     dns_tunnel_enable = optional(bool, false)
+    in_rotation       = optional(bool, true)
   }))
   default = {}
 }
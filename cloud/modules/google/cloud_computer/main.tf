@@ -10,6 +10,7 @@ module "vm_config" {
   vm_username         = var.vm_username
   cloud_provider      = "google"
   arch                = "x86_64"
+  egress_limit_gb     = 200
   ssh_keys            = var.ssh_keys
   custom_pre_config   = var.custom_pre_config
   custom_post_config  = var.custom_post_config
@@ -17,6 +18,7 @@ module "vm_config" {
   dns_tunnel_password = var.dns_tunnel_password
   https_proxy_config  = var.https_proxy_config
   https_proxy_secrets = var.https_proxy_secrets
+  quic_proxy_config   = var.quic_proxy_config
   ipsec_vpn_config    = var.ipsec_vpn_config
   ipsec_vpn_secrets   = var.ipsec_vpn_secrets
   wireguard_config    = var.wireguard_config
@@ -41,6 +43,14 @@ resource "google_project_iam_binding" "vm_service_account_compute_instance_admin
   ]
 }
 
+# Lets the egress accounting timer publish its month-end projection for the egress alert. A member
+# rather than a binding, as a binding would take the role off anything else in the project using it
+resource "google_project_iam_member" "vm_service_account_monitoring_metric_writer" {
+  project = var.project_id == "" ? google_compute_instance.free_tier_vm.project : var.project_id
+  role    = "roles/monitoring.metricWriter"
+  member  = "serviceAccount:${google_service_account.vm_service_account.email}"
+}
+
 resource "google_compute_instance" "free_tier_vm" {
   name         = "free-tier-vm"
   machine_type = "e2-micro"
@@ -90,3 +100,17 @@ data "google_compute_instance_guest_attributes" "wg_public_key" {
 
   depends_on = [google_compute_instance.free_tier_vm]
 }
+
+# Egress usage published by the egress-accounting timer on the VM (see vm_config)
+data "google_compute_instance_guest_attributes" "egress" {
+  count      = var.read_egress_usage ? 1 : 0
+  name       = google_compute_instance.free_tier_vm.name
+  zone       = var.zone
+  query_path = "${local.vm_guest_attr_namespace}/"
+
+  depends_on = [google_compute_instance.free_tier_vm]
+}
+
+locals {
+  egress_attrs = var.read_egress_usage ? { for attr in data.google_compute_instance_guest_attributes.egress[0].query_value : attr.key => attr.value } : {}
+}
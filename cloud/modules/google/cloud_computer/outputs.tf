@@ -89,8 +89,27 @@ output "wireguard" {
       var.wireguard_config.enable ? data.google_compute_instance_guest_attributes.wg_public_key[0].variable_value : null,
       module.vm_config.wireguard_public_key,
     "There was an error retrieving the public key. It can be retrieved by logging into the VM in the file at '/etc/wireguard/public.key'. Sometimes re-running 'plan' or 'apply' can resolve this.")
-    port          = var.wireguard_config.enable ? var.wireguard_config.port : null
-    server_ip     = var.wireguard_config.enable ? google_compute_instance.free_tier_vm.network_interface[0].access_config[0].nat_ip : null
-    client_config = module.vm_config.wireguard_client_config
+    port           = var.wireguard_config.enable ? var.wireguard_config.port : null
+    server_ip      = var.wireguard_config.enable ? google_compute_instance.free_tier_vm.network_interface[0].access_config[0].nat_ip : null
+    client_config  = module.vm_config.wireguard_client_config
+    client_configs = module.vm_config.wireguard_client_configs
+    peers          = module.vm_config.wireguard_peers
   }
 }
+
+output "quic_proxy" {
+  description = "QUIC (TUIC v5) proxy client settings (only if enabled)"
+  value = var.quic_proxy_config.enable ? merge(module.vm_config.quic_proxy, {
+    server_ip = google_compute_instance.free_tier_vm.network_interface[0].access_config[0].nat_ip
+  }) : null
+  sensitive = true
+}
+
+output "egress" {
+  description = "Month-to-date and projected month-end egress reported by the VM, in bytes (null unless read_egress_usage is set)"
+  value = var.read_egress_usage ? {
+    used_bytes      = try(tonumber(local.egress_attrs["egress-bytes"]), null)
+    projected_bytes = try(tonumber(local.egress_attrs["projected-egress-bytes"]), null)
+    limit_bytes     = try(tonumber(local.egress_attrs["limit-bytes"]), null)
+  } : null
+}
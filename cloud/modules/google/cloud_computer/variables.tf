@@ -109,6 +109,16 @@ variable "https_proxy_external_key_pem" {
   sensitive   = true
 }
 
+variable "quic_proxy_config" {
+  description = "Configuration for the QUIC (TUIC v5) proxy on UDP/443. Shares the HTTPS proxy's certificate and password"
+  type = object({
+    enable             = optional(bool, false)
+    zero_rtt           = optional(bool, true)
+    congestion_control = optional(string, "bbr")
+  })
+  default = {}
+}
+
 variable "ipsec_vpn_config" {
   description = "Configuration for the IPSec VPN"
   type = object({
@@ -144,10 +154,18 @@ variable "ipsec_vpn_secrets" {
 variable "wireguard_config" {
   description = "Configuration for WireGuard VPN"
   type = object({
-    enable            = bool
-    port              = number
-    client_public_key = string
-    client_ip         = string
+    enable             = bool
+    port               = number
+    client_public_key  = string
+    client_ip          = string
+    client_allowed_ips = optional(string, "0.0.0.0/0")
+    address_pool       = optional(string, "")
+    peers = optional(list(object({
+      name        = string
+      public_key  = string
+      address     = optional(string, "")
+      allowed_ips = optional(string, "0.0.0.0/0")
+    })), [])
   })
   default = {
     enable            = false
@@ -200,3 +218,9 @@ variable "ssh_ports" {
     error_message = "ssh_ports cannot include port 443 (HTTPS) or port 53 (DNS)"
   }
 }
+
+variable "read_egress_usage" {
+  description = "Read the egress usage the VM publishes to guest attributes. Fails if the VM has not finished booting, so only enable once it has"
+  type        = bool
+  default     = false
+}
@@ -30,10 +30,12 @@ module "cloud_computer" {
   pingtunnel_aes_key  = var.pingtunnel_aes_key
   custom_pre_config   = var.custom_pre_config
   custom_post_config  = var.custom_post_config
+  quic_proxy_config   = var.quic_proxy_config
   ipsec_vpn_config    = var.ipsec_vpn_config
   ipsec_vpn_secrets   = var.ipsec_vpn_secrets
   wireguard_config    = var.wireguard_config
   ssh_ports           = var.ssh_ports
+  read_egress_usage   = var.read_egress_usage
 
   # Ensure API is enabled and ready before creating compute resources
   depends_on = [time_sleep.wait_compute_api]
@@ -53,8 +55,22 @@ resource "google_monitoring_notification_channel" "email" {
   }
 }
 
+# The VM's egress accounting publishes its month-end projection here. Declared up front, as alert
+# policies can't be created against a metric that doesn't exist yet
+resource "google_monitoring_metric_descriptor" "projected_egress" {
+  count = var.alert_email != null ? 1 : 0
+
+  type         = "custom.googleapis.com/free_cloud_vpn/projected_egress_bytes"
+  display_name = "Projected month-end egress"
+  description  = "Month-to-date egress through the VM's primary interface, linearly projected to the end of the month"
+  metric_kind  = "GAUGE"
+  value_type   = "INT64"
+  unit         = "By"
+}
+
 # Monitor network egress approaching free tier limit. Not sure this is monitoring the right metric,
 # or even the right amount. I believe there are exceptions for traffic to Google services, for example.
+# The second condition fires early, as soon as the projection says the month will go over
 resource "google_monitoring_alert_policy" "network_usage" {
   count = var.alert_email != null ? 1 : 0
 
@@ -81,10 +97,29 @@ resource "google_monitoring_alert_policy" "network_usage" {
     }
   }
 
+  conditions {
+    display_name = "Projected month-end egress over free tier limit"
+    condition_threshold {
+      filter          = "metric.type=\"${google_monitoring_metric_descriptor.projected_egress[0].type}\" AND resource.type=\"gce_instance\""
+      duration        = "1800s" # Don't page on a single burst early in the month
+      comparison      = "COMPARISON_GT"
+      threshold_value = 214748364800 # 200GB
+
+      aggregations {
+        alignment_period   = "300s"
+        per_series_aligner = "ALIGN_MAX"
+      }
+
+      trigger {
+        count = 1
+      }
+    }
+  }
+
   notification_channels = [for channel in google_monitoring_notification_channel.email : channel.name]
 
   documentation {
-    content   = "Network egress is approaching the Google Cloud free tier limit of 200GB per month. Consider reducing network usage to avoid charges."
+    content   = "Network egress is approaching, or is projected to exceed, the Google Cloud free tier limit of 200GB per month. Consider reducing network usage to avoid charges."
     mime_type = "text/markdown"
   }
 }
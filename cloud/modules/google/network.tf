@@ -9,7 +9,8 @@ locals {
 
   firewall_udp_ports = concat(
     ["53", "500", "4500"],
-    var.wireguard_config.enable ? [tostring(var.wireguard_config.port)] : []
+    var.wireguard_config.enable ? [tostring(var.wireguard_config.port)] : [],
+    var.quic_proxy_config.enable ? ["443"] : [] # QUIC proxy
   )
 
   enable_icmp = var.enable_pingtunnel
@@ -37,6 +37,11 @@ output "dns_tunnel_password" {
   sensitive   = true
 }
 
+output "dns_tunnel_domain" {
+  description = "The domain configured for the DNS tunnel (only if enabled)"
+  value       = module.cloud_computer.dns_tunnel_domain
+}
+
 output "https_proxy" {
   description = "Non-sensitive HTTPS proxy configuration"
   value       = module.cloud_computer.https_proxy
@@ -53,6 +58,12 @@ output "wireguard" {
   value       = module.cloud_computer.wireguard
 }
 
+output "quic_proxy" {
+  description = "QUIC (TUIC v5) proxy client settings (only if enabled)"
+  value       = module.cloud_computer.quic_proxy
+  sensitive   = true
+}
+
 output "ipsec_vpn" {
   description = "IPSec/IKEv2 VPN configuration and status"
   value       = module.cloud_computer.ipsec_vpn
@@ -63,3 +74,8 @@ output "ipsec_vpn_secrets" {
   value       = module.cloud_computer.ipsec_vpn_secrets
   sensitive   = true
 }
+
+output "egress" {
+  description = "Month-to-date and projected month-end egress reported by the VM, in bytes"
+  value       = module.cloud_computer.egress
+}
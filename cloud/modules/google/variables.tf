@@ -101,6 +101,16 @@ variable "custom_post_config" {
   default     = ""
 }
 
+variable "quic_proxy_config" {
+  description = "Configuration for the QUIC (TUIC v5) proxy on UDP/443. Shares the HTTPS proxy's certificate and password"
+  type = object({
+    enable             = optional(bool, false)
+    zero_rtt           = optional(bool, true)
+    congestion_control = optional(string, "bbr")
+  })
+  default = {}
+}
+
 variable "ipsec_vpn_config" {
   description = "Configuration for IPSec/IKEv2 VPN"
   type = object({
@@ -136,6 +146,13 @@ variable "wireguard_config" {
     client_public_key  = string
     client_ip          = string
     client_allowed_ips = string
+    address_pool       = optional(string, "")
+    peers = optional(list(object({
+      name        = string
+      public_key  = string
+      address     = optional(string, "")
+      allowed_ips = optional(string, "0.0.0.0/0")
+    })), [])
   })
   default = {
     enable             = false
@@ -175,3 +192,9 @@ variable "ssh_ports" {
     error_message = "ssh_ports cannot include port 443 (HTTPS) or port 53 (DNS)"
   }
 }
+
+variable "read_egress_usage" {
+  description = "Read the egress usage the VM publishes to guest attributes. Fails if the VM has not finished booting, so only enable once it has"
+  type        = bool
+  default     = false
+}
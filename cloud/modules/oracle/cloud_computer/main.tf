@@ -13,6 +13,7 @@ module "vm_config" {
   vm_username         = var.vm_username
   cloud_provider      = "oracle"
   arch                = "arm64"
+  egress_limit_gb     = 10240
   ssh_keys            = var.ssh_keys
   custom_pre_config   = var.custom_pre_config
   custom_post_config  = var.custom_post_config
@@ -20,6 +21,7 @@ module "vm_config" {
   dns_tunnel_password = var.dns_tunnel_password
   https_proxy_config  = var.https_proxy_config
   https_proxy_secrets = var.https_proxy_secrets
+  quic_proxy_config   = var.quic_proxy_config
   ipsec_vpn_config    = var.ipsec_vpn_config
   ipsec_vpn_secrets   = var.ipsec_vpn_secrets
   wireguard_config    = var.wireguard_config
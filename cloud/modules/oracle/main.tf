@@ -46,6 +46,7 @@ module "cloud_computer" {
   dns_tunnel_password = var.dns_tunnel_password
   https_proxy_config  = var.https_proxy_config
   https_proxy_secrets = var.https_proxy_secrets
+  quic_proxy_config   = var.quic_proxy_config
   ipsec_vpn_config    = var.ipsec_vpn_config
   ipsec_vpn_secrets   = var.ipsec_vpn_secrets
   wireguard_config    = var.wireguard_config
@@ -102,6 +102,30 @@ resource "oci_core_security_list" "free_tier_sl" {
     }
   }
 
+  # QUIC proxy (443) UDP
+  dynamic "ingress_security_rules" {
+    for_each = var.quic_proxy_config.enable ? [1] : []
+    content {
+      protocol = "17" # UDP
+      source   = "0.0.0.0/0"
+      udp_options {
+        min = 443
+        max = 443
+      }
+    }
+  }
+  dynamic "ingress_security_rules" {
+    for_each = var.ipv6_enabled && var.quic_proxy_config.enable ? [1] : []
+    content {
+      protocol = "17" # UDP
+      source   = "::/0"
+      udp_options {
+        min = 443
+        max = 443
+      }
+    }
+  }
+
   # HTTP (80) - for certbot or other
   ingress_security_rules {
     protocol = "6" # TCP
@@ -62,6 +62,14 @@ output "https_proxy_secrets" {
   sensitive   = true
 }
 
+output "quic_proxy" {
+  description = "QUIC (TUIC v5) proxy client settings (only if enabled)"
+  value = var.quic_proxy_config.enable ? merge(module.cloud_computer.vm_config.quic_proxy, {
+    server_ip = module.cloud_computer.public_ip
+  }) : null
+  sensitive = true
+}
+
 output "ipsec_vpn_username" {
   description = "The username for the IPSec VPN"
   value       = module.cloud_computer.vm_config.ipsec_vpn_username
@@ -93,8 +101,10 @@ output "wireguard" {
     public_key = coalesce(
       module.cloud_computer.vm_config.wireguard_public_key,
     "There was an error retrieving the public key. It can be retrieved by logging into the VM in the file at '/etc/wireguard/public.key'. Sometimes re-running 'plan' or 'apply' can resolve this.")
-    port          = var.wireguard_config.enable ? var.wireguard_config.port : null
-    server_ip     = var.wireguard_config.enable ? module.cloud_computer.public_ip : null
-    client_config = module.cloud_computer.vm_config.wireguard_client_config
+    port           = var.wireguard_config.enable ? var.wireguard_config.port : null
+    server_ip      = var.wireguard_config.enable ? module.cloud_computer.public_ip : null
+    client_config  = module.cloud_computer.vm_config.wireguard_client_config
+    client_configs = module.cloud_computer.vm_config.wireguard_client_configs
+    peers          = module.cloud_computer.vm_config.wireguard_peers
   }
 }
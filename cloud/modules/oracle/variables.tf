@@ -97,6 +97,16 @@ variable "https_proxy_secrets" {
   }
 }
 
+variable "quic_proxy_config" {
+  description = "Configuration for the QUIC (TUIC v5) proxy on UDP/443. Shares the HTTPS proxy's certificate and password"
+  type = object({
+    enable             = optional(bool, false)
+    zero_rtt           = optional(bool, true)
+    congestion_control = optional(string, "bbr")
+  })
+  default = {}
+}
+
 variable "ipsec_vpn_config" {
   description = "Configuration for IPSec/IKEv2 VPN"
   type = object({
@@ -121,10 +131,18 @@ variable "ipsec_vpn_secrets" {
 variable "wireguard_config" {
   description = "Configuration for WireGuard VPN"
   type = object({
-    enable            = optional(bool, true)
-    port              = optional(string, "51820")
-    client_ip         = optional(string, "10.0.0.2/24")
-    client_public_key = optional(string, "")
+    enable             = optional(bool, true)
+    port               = optional(string, "51820")
+    client_ip          = optional(string, "10.0.0.2/24")
+    client_public_key  = optional(string, "")
+    client_allowed_ips = optional(string, "0.0.0.0/0")
+    address_pool       = optional(string, "")
+    peers = optional(list(object({
+      name        = string
+      public_key  = string
+      address     = optional(string, "")
+      allowed_ips = optional(string, "0.0.0.0/0")
+    })), [])
   })
   default = {
     enable = true
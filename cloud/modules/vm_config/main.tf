@@ -5,6 +5,7 @@ locals {
   )
   effective_proxy_password = var.https_proxy_secrets.password != "" ? var.https_proxy_secrets.password : random_password.proxy[0].result
   has_proxy_domain         = var.https_proxy_config.domain != ""
+  effective_proxy_domain   = local.has_proxy_domain ? var.https_proxy_config.domain : "proxy.local"
   effective_vpn_username   = var.ipsec_vpn_config.username != "" ? var.ipsec_vpn_config.username : var.vm_username
   effective_vpn_password = var.ipsec_vpn_secrets.password != "" ? var.ipsec_vpn_secrets.password : (
     var.ipsec_vpn_config.enable ? random_password.vpn[0].result : ""
@@ -18,14 +19,52 @@ locals {
   effective_pingtunnel_aes_key = var.pingtunnel_aes_key != "" ? var.pingtunnel_aes_key : (
     var.enable_pingtunnel ? random_password.pingtunnel_aes_key[0].result : ""
   )
+  quic_proxy_uuid       = var.quic_proxy_config.enable ? random_uuid.quic_proxy[0].result : ""
   vpn_client_network    = split("/", var.ipsec_vpn_config.client_ip_pool)[0]
   vpn_client_netmask    = cidrnetmask(var.ipsec_vpn_config.client_ip_pool)
   vpn_server_ip         = cidrhost(var.ipsec_vpn_config.client_ip_pool, 1)
   vpn_client_ip_start   = cidrhost(var.ipsec_vpn_config.client_ip_pool, 100)
   vpn_client_ip_end     = cidrhost(var.ipsec_vpn_config.client_ip_pool, 200)
-  wireguard_server_ip   = replace(var.wireguard_config.client_ip, "2/24", "1/24") # Replace last octet with 1
   wireguard_private_key = var.wireguard_config.enable ? tls_private_key.wireguard[0].private_key_pem : ""
 
+  # WireGuard peers. The server takes the first host of the address pool, and peers without an
+  # explicit address are handed the following hosts in list order, skipping any already claimed by
+  # an explicit address. If no peers are given, the legacy single client_public_key/client_ip pair
+  # is treated as a peer named "client".
+  wireguard_address_pool = var.wireguard_config.address_pool != "" ? var.wireguard_config.address_pool : cidrsubnet(var.wireguard_config.client_ip, 0, 0)
+  wireguard_pool_prefix  = split("/", local.wireguard_address_pool)[1]
+  wireguard_server_ip    = "${cidrhost(local.wireguard_address_pool, 1)}/${local.wireguard_pool_prefix}"
+  wireguard_requested_peers = length(var.wireguard_config.peers) > 0 ? var.wireguard_config.peers : [{
+    name        = "client"
+    public_key  = var.wireguard_config.client_public_key
+    address     = var.wireguard_config.client_ip
+    allowed_ips = var.wireguard_config.client_allowed_ips
+  }]
+  wireguard_claimed_hosts   = [for peer in local.wireguard_requested_peers : split("/", peer.address)[0] if peer.address != ""]
+  wireguard_auto_peer_names = [for peer in local.wireguard_requested_peers : peer.name if peer.address == ""]
+  # One candidate per peer, so even if explicit addresses claim some of them there are enough left
+  # over for every peer without an address
+  wireguard_free_hosts = length(local.wireguard_auto_peer_names) == 0 ? [] : [
+    for n in range(2, 2 + length(local.wireguard_requested_peers)) : cidrhost(local.wireguard_address_pool, n)
+    if !contains(local.wireguard_claimed_hosts, cidrhost(local.wireguard_address_pool, n))
+  ]
+  wireguard_peer_hosts = { for peer in local.wireguard_requested_peers : peer.name => (
+    peer.address != "" ? split("/", peer.address)[0] : local.wireguard_free_hosts[index(local.wireguard_auto_peer_names, peer.name)]
+  ) }
+  wireguard_peers = [for peer in local.wireguard_requested_peers : {
+    name        = peer.name
+    public_key  = peer.public_key
+    address     = peer.address != "" ? peer.address : "${local.wireguard_peer_hosts[peer.name]}/${local.wireguard_pool_prefix}"
+    tunnel_ip   = "${local.wireguard_peer_hosts[peer.name]}/32"
+    allowed_ips = peer.allowed_ips
+  }]
+  # Peers without a public key can't be added to wg0.conf, but still get a client config rendered
+  wireguard_server_peers = [for peer in local.wireguard_peers : peer if peer.public_key != ""]
+
+  # Per-stage provisioning timings and monthly egress usage, read back by the tester
+  provision_status_file = "/var/lib/free-cloud-vpn/provision-status"
+  egress_status_file    = "/var/lib/free-cloud-vpn/egress-status"
+
   #Google-specific constants
   vm_guest_attr_namespace = "free-tier-vm-guestattr-namespace"
   wg_pubkey_attr_key      = "wireguard-public-key"
@@ -73,6 +112,10 @@ resource "random_password" "pingtunnel_aes_key" {
   special = false
 }
 
+resource "random_uuid" "quic_proxy" {
+  count = var.quic_proxy_config.enable ? 1 : 0
+}
+
 resource "tls_private_key" "wireguard" {
   count     = var.wireguard_config.enable ? 1 : 0
   algorithm = "ED25519"
@@ -87,11 +130,12 @@ resource "tls_self_signed_cert" "proxy" {
   count           = local.has_proxy_domain ? 0 : 1
   private_key_pem = tls_private_key.proxy[0].private_key_pem
 
+  # Issued for the name handed out as the proxy domain/SNI, so clients can verify against this cert
   subject {
-    common_name = "ACME, Inc."
+    common_name = local.effective_proxy_domain
   }
 
-  dns_names = ["ACME, Inc."]
+  dns_names = [local.effective_proxy_domain]
 
   validity_period_hours = 8760 # 1 year
 
@@ -104,6 +148,27 @@ resource "tls_self_signed_cert" "proxy" {
 
 # Startup script template variables
 locals {
+  # Every enabled feature's packages, installed in a single apt transaction by the startup script
+  provision_packages = distinct(concat(
+    ["htop", "netcat-traditional", "tinyproxy", "apache2-utils", "stunnel4"],
+    !local.has_external_https_cert && local.has_proxy_domain ? ["certbot", "openssl"] : [],
+    var.wireguard_config.enable ? ["wireguard", "openssl"] : [],
+    var.enable_pingtunnel ? ["unzip"] : [],
+    var.dns_tunnel_config.enable ? ["iodine"] : [],
+    var.ipsec_vpn_config.enable ? ["strongswan", "strongswan-pki", "libcharon-extra-plugins", "libcharon-extauth-plugins", "libstrongswan-extra-plugins"] : [],
+  ))
+
+  # Binaries fetched in the background while apt runs (destination => URL)
+  tuic_server_version = "1.0.0"
+  provision_downloads = merge(
+    var.enable_pingtunnel ? {
+      "/tmp/pingtunnel.zip" = "https://github.com/tfriesen/pingtunnel-encrypted/releases/download/latest/pingtunnel_linux_${var.arch == "arm64" ? "arm" : "amd64"}.zip"
+    } : {},
+    var.quic_proxy_config.enable ? {
+      "/tmp/tuic-server" = "https://github.com/EAimTY/tuic/releases/download/tuic-server-${local.tuic_server_version}/tuic-server-${local.tuic_server_version}-${var.arch == "arm64" ? "aarch64" : "x86_64"}-unknown-linux-gnu"
+    } : {},
+  )
+
   startup_script_vars = {
     # Path and SSH
     path      = path.module
@@ -117,11 +182,21 @@ locals {
     custom_pre_config  = var.custom_pre_config
     custom_post_config = var.custom_post_config
 
+    # Provisioning plan
+    packages              = local.provision_packages
+    downloads             = local.provision_downloads
+    provision_status_file = local.provision_status_file
+
+    # Egress accounting
+    egress_status_file = local.egress_status_file
+    egress_limit_bytes = floor(var.egress_limit_gb * 1024 * 1024 * 1024)
+
     # WireGuard
     wireguard_enabled       = var.wireguard_config.enable
     wireguard_private_key   = local.wireguard_private_key
     wireguard_server_ip     = local.wireguard_server_ip
     wireguard_config        = var.wireguard_config
+    wireguard_peers         = local.wireguard_server_peers
     vm_guest_attr_namespace = local.vm_guest_attr_namespace
     wg_pubkey_attr_key      = local.wg_pubkey_attr_key
 
@@ -134,13 +209,18 @@ locals {
     effective_proxy_password      = local.effective_proxy_password
     https_proxy_username          = var.https_proxy_config.username
     has_proxy_domain              = local.has_proxy_domain
-    https_proxy_domain            = var.https_proxy_config.domain != "" ? var.https_proxy_config.domain : "proxy.local"
+    https_proxy_domain            = local.effective_proxy_domain
     tls_self_signed_cert_proxy    = local.has_proxy_domain ? "" : tls_self_signed_cert.proxy[0].cert_pem
     tls_private_key_proxy_cert    = local.has_proxy_domain ? "" : tls_private_key.proxy[0].private_key_pem
     https_proxy_external_cert_pem = var.https_proxy_config.external_cert_pem
     https_proxy_external_key_pem  = var.https_proxy_secrets.external_key_pem
     has_external_https_cert       = local.has_external_https_cert
 
+    # QUIC proxy
+    quic_proxy_enabled = var.quic_proxy_config.enable
+    quic_proxy_uuid    = local.quic_proxy_uuid
+    quic_proxy_config  = var.quic_proxy_config
+
     # DNS Tunnel
     dns_tunnel_enabled     = var.dns_tunnel_config.enable
     effective_dns_password = local.effective_dns_password
@@ -38,7 +38,7 @@ output "https_proxy" {
   description = "Non-sensitive HTTPS proxy configuration"
   value = {
     username = var.https_proxy_config.username
-    domain   = var.https_proxy_config.domain != "" ? var.https_proxy_config.domain : "proxy.local"
+    domain   = local.effective_proxy_domain
     cert     = local.has_proxy_domain ? "" : tls_self_signed_cert.proxy[0].cert_pem
   }
 }
@@ -52,6 +52,25 @@ output "https_proxy_secrets" {
   sensitive = true
 }
 
+output "quic_proxy" {
+  description = "QUIC (TUIC v5) proxy client settings (only if enabled). The password is the HTTPS proxy password"
+  value = var.quic_proxy_config.enable ? {
+    port               = 443
+    uuid               = local.quic_proxy_uuid
+    password           = local.effective_proxy_password
+    sni                = local.effective_proxy_domain
+    alpn               = ["h3"]
+    zero_rtt           = var.quic_proxy_config.zero_rtt
+    congestion_control = var.quic_proxy_config.congestion_control
+    # The cert the server presents, for the client's certificates list. Empty for Let's Encrypt,
+    # which clients already trust
+    cert = local.has_external_https_cert ? var.https_proxy_config.external_cert_pem : (
+      local.has_proxy_domain ? "" : tls_self_signed_cert.proxy[0].cert_pem
+    )
+  } : null
+  sensitive = true
+}
+
 output "ipsec_vpn_username" {
   description = "The username for the IPSec VPN"
   value       = var.ipsec_vpn_config.enable ? local.effective_vpn_username : null
@@ -80,14 +99,49 @@ output "wireguard_private_key" {
   sensitive   = true
 }
 
+output "wireguard_peers" {
+  description = "WireGuard peers with their allocated tunnel addresses (only if enabled)"
+  value = var.wireguard_config.enable ? [for peer in local.wireguard_peers : {
+    name       = peer.name
+    public_key = peer.public_key
+    address    = peer.address
+  }] : null
+
+  precondition {
+    condition = !var.wireguard_config.enable || length(distinct(concat(
+      ["${cidrhost(local.wireguard_address_pool, 1)}/32"], [for peer in local.wireguard_peers : peer.tunnel_ip]
+    ))) == length(local.wireguard_peers) + 1
+    error_message = "WireGuard peer addresses must be unique, and can't use the server's address (the first host of address_pool)"
+  }
+  precondition {
+    condition = !var.wireguard_config.enable || alltrue([
+      for host in local.wireguard_claimed_hosts : try(cidrhost("${host}/${local.wireguard_pool_prefix}", 0) == cidrhost(local.wireguard_address_pool, 0), false)
+    ])
+    error_message = "Explicit WireGuard peer addresses must fall inside address_pool"
+  }
+}
+
+output "wireguard_client_configs" {
+  description = "WireGuard client configuration for each peer, keyed by peer name (only if enabled)"
+  value = var.wireguard_config.enable ? { for peer in local.wireguard_peers : peer.name => templatefile("${path.module}/templates/wireguard-client.conf.tpl", {
+    peer_name     = peer.name
+    server_pubkey = tls_private_key.wireguard[0].public_key_openssh
+    client_ip     = peer.address
+    allowed_ips   = peer.allowed_ips
+    server_ip     = local.wireguard_server_ip
+    server_port   = var.wireguard_config.port
+  }) } : null
+}
+
 output "wireguard_client_config" {
-  description = "WireGuard client configuration (only if enabled)"
+  description = "WireGuard client configuration for the first peer (only if enabled)"
   value = var.wireguard_config.enable ? templatefile("${path.module}/templates/wireguard-client.conf.tpl", {
-    client_private_key = nonsensitive(tls_private_key.wireguard[0].private_key_openssh)
-    server_pubkey      = tls_private_key.wireguard[0].public_key_openssh
-    client_ip          = var.wireguard_config.client_ip
-    server_ip          = local.wireguard_server_ip
-    server_port        = var.wireguard_config.port
+    peer_name     = local.wireguard_peers[0].name
+    server_pubkey = tls_private_key.wireguard[0].public_key_openssh
+    client_ip     = local.wireguard_peers[0].address
+    allowed_ips   = local.wireguard_peers[0].allowed_ips
+    server_ip     = local.wireguard_server_ip
+    server_port   = var.wireguard_config.port
   }) : null
 }
 
@@ -113,7 +167,8 @@ output "firewall_udp_ports" {
   description = "UDP ports that should be opened in firewall"
   value = concat(
     ["53", "500", "4500"],
-    var.wireguard_config.enable ? [var.wireguard_config.port] : []
+    var.wireguard_config.enable ? [var.wireguard_config.port] : [],
+    var.quic_proxy_config.enable ? ["443"] : []
   )
 }
 
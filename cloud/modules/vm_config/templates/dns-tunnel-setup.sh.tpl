@@ -1,8 +1,17 @@
-DEBIAN_FRONTEND=noninteractive apt-get install -y iodine
-
 # -n auto won't work as externalip.net is kaput, but iodine won't let the client specify the server IP :/
 # Without, you can't use raw mode, which has MUCH better performance
-PUB_IP=$(curl -q -s --max-time 5 api.ipify.org || true)
+# So try a few lookup services, a few times each, before giving up on it
+PUB_IP=""
+for attempt in 1 2 3; do
+  for url in api.ipify.org ifconfig.me/ip icanhazip.com; do
+    PUB_IP=$(curl -q -s --max-time 5 "$url" | tr -d '[:space:]' || true)
+    if echo "$PUB_IP" | grep -Eq '^([0-9]{1,3}\.){3}[0-9]{1,3}$'; then
+      break 2
+    fi
+    PUB_IP=""
+  done
+  sleep 2
+done
 
 # Configure iodine DNS tunnel
 cat > /etc/default/iodine << 'IODINECONF'
@@ -17,10 +26,24 @@ IODINED_ARGS="-n __PUBLIC_IP__ -c ${dns_tunnel_config.server_ip} ${dns_tunnel_co
 IODINECONF
 
 # Replace placeholder with detected public IPv4 using sed (post-write)
+# The startup script runs every boot, so the login warning is its own file, cleared once a lookup works
+RAW_MODE_MOTD=/etc/motd.d/iodine-raw-mode
 if [ -n "$PUB_IP" ]; then
   sed -i "s/__PUBLIC_IP__/$PUB_IP/g" /etc/default/iodine
+  rm -f "$RAW_MODE_MOTD"
 else
-  echo "WARN: Could not determine public IP; leaving placeholder in /etc/default/iodine" >&2
+  # iodined refuses to start with a bogus -n, so drop it and fall back to relay-only mode
+  sed -i "s/-n __PUBLIC_IP__ //g" /etc/default/iodine
+  RAW_MODE_WARNING="WARNING: DNS tunnel raw mode is DISABLED. Could not determine this VM's public IP, so iodined is running without -n and clients will be stuck in (slow) relay mode. Fix the lookup and re-run this script, or set -n <public ip> in /etc/default/iodine and restart iodined."
+  echo "" >&2
+  echo "************************************************************" >&2
+  echo "$RAW_MODE_WARNING" >&2
+  echo "************************************************************" >&2
+  echo "" >&2
+  logger -p daemon.warning -t iodined-setup "$RAW_MODE_WARNING" || true
+  # Make sure whoever logs in next sees it too
+  mkdir -p "$(dirname "$RAW_MODE_MOTD")"
+  echo "$RAW_MODE_WARNING" > "$RAW_MODE_MOTD"
 fi
 
 #Firewall rules for iodine server and forwarding.
@@ -30,5 +53,5 @@ iptables -t nat -I POSTROUTING -o $(ls /sys/class/net/ | grep en) -j MASQUERADE
 
 chmod 600 /etc/default/iodine
 systemctl unmask iodined
-systemctl enable iodined
-systemctl restart iodined 
+# Started with the other services at the end of the startup script
+SERVICES="$SERVICES iodined"
@@ -0,0 +1,143 @@
+# Egress accounting: accumulate per-interface (incl. wg0/dns0 tunnels) byte counters into monthly
+# totals on disk, so usage survives reboots, and project month-end egress against the free tier limit
+mkdir -p /var/lib/free-cloud-vpn/egress
+
+cat > /usr/local/bin/egress-accounting << 'EGRESSSCRIPT'
+#!/bin/bash
+set -eu
+
+STATE_DIR=/var/lib/free-cloud-vpn/egress
+STATUS_FILE="${egress_status_file}"
+LIMIT_BYTES=${egress_limit_bytes}
+
+month=$(date -u +%Y-%m)
+totals="$STATE_DIR/$month"     # iface tx rx, accumulated over the month
+last="$STATE_DIR/last-sample"  # boot id, then iface tx rx as raw kernel counters at the last sample
+boot_id=$(cat /proc/sys/kernel/random/boot_id)
+
+exec 9> "$STATE_DIR/.lock"
+flock 9
+touch "$totals" "$last"
+
+# Kernel counters start from zero after a reboot, so don't diff against samples from a previous boot
+if [ "$(head -n 1 "$last")" != "$boot_id" ]; then
+  echo "$boot_id" > "$last"
+fi
+
+current=$(for dev in /sys/class/net/*; do
+  iface=$(basename "$dev")
+  [ "$iface" = "lo" ] && continue
+  echo "$iface $(cat "$dev/statistics/tx_bytes") $(cat "$dev/statistics/rx_bytes")"
+done)
+
+# A counter lower than last time means the interface was recreated (eg. wg-quick restart); count from zero
+echo "$current" | awk -v last="$last" -v totals="$totals" '
+  BEGIN {
+    while ((getline line < last) > 0) { split(line, f, " "); if (f[2] != "") { lt[f[1]] = f[2]; lr[f[1]] = f[3] } }
+    while ((getline line < totals) > 0) { split(line, f, " "); tt[f[1]] = f[2]; tr[f[1]] = f[3] }
+  }
+  NF == 3 {
+    dt = ($2 >= lt[$1]) ? $2 - lt[$1] : $2
+    dr = ($3 >= lr[$1]) ? $3 - lr[$1] : $3
+    tt[$1] += dt; tr[$1] += dr
+  }
+  END { for (i in tt) printf "%s %.0f %.0f\n", i, tt[i], tr[i] }
+' > "$totals.tmp"
+mv "$totals.tmp" "$totals"
+{ echo "$boot_id"; echo "$current"; } > "$last"
+
+# Billable egress is what leaves through the primary interface; tunnels are already counted in it
+primary=$(ip -o -4 route show to default | awk '{print $5; exit}')
+egress=$(awk -v i="$primary" '$1 == i {print $2}' "$totals")
+egress=$${egress:-0}
+
+# Linear projection to month end. Wait an hour into the month so a burst doesn't project to the moon
+now=$(date -u +%s)
+month_start=$(date -u -d "$month-01" +%s)
+month_end=$(date -u -d "$month-01 +1 month" +%s)
+elapsed=$(( now - month_start ))
+[ "$elapsed" -lt 3600 ] && elapsed=3600
+projected=$(awk -v e="$egress" -v el="$elapsed" -v len="$(( month_end - month_start ))" 'BEGIN {printf "%.0f", e * len / el}')
+
+{
+  echo "month=$month"
+  echo "primary-interface=$primary"
+  echo "egress-bytes=$egress"
+  echo "projected-egress-bytes=$projected"
+  echo "limit-bytes=$LIMIT_BYTES"
+  echo "updated-at=$now"
+  awk '{print "iface-" $1 "-tx-bytes=" $2; print "iface-" $1 "-rx-bytes=" $3}' "$totals"
+} > "$STATUS_FILE.tmp"
+mv "$STATUS_FILE.tmp" "$STATUS_FILE"
+
+if [ "${cloud_provider}" = "google" ]; then
+  for key in egress-bytes projected-egress-bytes limit-bytes; do
+    value=$(awk -F= -v k="$key" '$1 == k {print $2}' "$STATUS_FILE")
+    curl -s --max-time 5 -X PUT -H "Metadata-Flavor: Google" --data "$value" \
+      http://metadata.google.internal/computeMetadata/v1/instance/guest-attributes/${vm_guest_attr_namespace}/$key > /dev/null || true
+  done
+
+  # Also publish the projection as a custom metric, which the Cloud Monitoring egress alert watches
+  md=http://metadata.google.internal/computeMetadata/v1
+  token=$(curl -s --max-time 5 -H "Metadata-Flavor: Google" "$md/instance/service-accounts/default/token" | sed -n 's/.*"access_token" *: *"\([^"]*\)".*/\1/p' || true)
+  project=$(curl -s --max-time 5 -H "Metadata-Flavor: Google" "$md/project/project-id" || true)
+  instance_id=$(curl -s --max-time 5 -H "Metadata-Flavor: Google" "$md/instance/id" || true)
+  zone=$(curl -s --max-time 5 -H "Metadata-Flavor: Google" "$md/instance/zone" | awk -F/ '{print $NF}' || true)
+  if [ -n "$token" ] && [ -n "$project" ]; then
+    # -f/-S so a rejected write (eg. a 403 if the service account lost monitoring.metricWriter) shows up
+    # in the journal instead of the alert silently going without data
+    curl -fsS --max-time 10 -X POST -H "Authorization: Bearer $token" -H "Content-Type: application/json" \
+      "https://monitoring.googleapis.com/v3/projects/$project/timeSeries" --data @- > /dev/null << METRIC \
+      || echo "WARN: could not publish projected egress to Cloud Monitoring" >&2
+{"timeSeries": [{
+  "metric": {"type": "custom.googleapis.com/free_cloud_vpn/projected_egress_bytes"},
+  "resource": {"type": "gce_instance", "labels": {"project_id": "$project", "instance_id": "$instance_id", "zone": "$zone"}},
+  "points": [{"interval": {"endTime": "$(date -u -d "@$now" +%Y-%m-%dT%H:%M:%SZ)"}, "value": {"int64Value": "$projected"}}]
+}]}
+METRIC
+  else
+    echo "WARN: no service account token or project id from the metadata server, not publishing projected egress" >&2
+  fi
+fi
+EGRESSSCRIPT
+chmod 755 /usr/local/bin/egress-accounting
+
+# Sample every 5 minutes, and once more on shutdown so the last few minutes before a reboot aren't lost
+cat > /etc/systemd/system/egress-accounting.service << 'EGRESSSERVICE'
+[Unit]
+Description=Egress accounting sample
+
+[Service]
+Type=oneshot
+ExecStart=/usr/local/bin/egress-accounting
+EGRESSSERVICE
+
+cat > /etc/systemd/system/egress-accounting.timer << 'EGRESSTIMER'
+[Unit]
+Description=Egress accounting every 5 minutes
+
+[Timer]
+OnBootSec=1min
+OnUnitActiveSec=5min
+
+[Install]
+WantedBy=timers.target
+EGRESSTIMER
+
+cat > /etc/systemd/system/egress-accounting-shutdown.service << 'EGRESSSHUTDOWN'
+[Unit]
+Description=Egress accounting sample at shutdown
+After=network.target
+
+[Service]
+Type=oneshot
+RemainAfterExit=yes
+ExecStart=/bin/true
+ExecStop=/usr/local/bin/egress-accounting
+
+[Install]
+WantedBy=multi-user.target
+EGRESSSHUTDOWN
+
+# Started with the other services at the end of the startup script
+SERVICES="$SERVICES egress-accounting.timer egress-accounting-shutdown.service"
@@ -1,5 +1,4 @@
 # Configure IPSec/IKEv2 VPN (PSK-based)
-DEBIAN_FRONTEND=noninteractive apt-get install -y strongswan strongswan-pki libcharon-extra-plugins libcharon-extauth-plugins libstrongswan-extra-plugins
 
 # Configure IPSec
 cat > /etc/ipsec.conf << 'IPSECCONF'
@@ -84,6 +83,6 @@ iptables -I INPUT -p esp -j ACCEPT
 
 
 
-# Restart services
-systemctl enable ipsec
-systemctl restart ipsec 
+# Started with the other services at the end of the startup script. ipsec.service is only an alias
+# of strongswan-starter, and systemd refuses to enable units by an alias name
+SERVICES="$SERVICES strongswan-starter"
@@ -1,25 +1,14 @@
-# Install build dependencies for pingtunnel
-DEBIAN_FRONTEND=noninteractive apt-get install -y wget unzip
-
-# Download and install pingtunnel
-cd /tmp
-# Use the architecture variable to download the correct version
-if [ "${arch}" = "arm64" ]; then
-  wget https://github.com/tfriesen/pingtunnel-encrypted/releases/download/latest/pingtunnel_linux_arm.zip
-  unzip pingtunnel_linux_arm.zip
-elif [ "${arch}" = "x86_64" ]; then
-  wget https://github.com/tfriesen/pingtunnel-encrypted/releases/download/latest/pingtunnel_linux_amd64.zip
-  unzip pingtunnel_linux_amd64.zip
-else
-  # Default to x86_64 if arch is not recognized
-  wget https://github.com/tfriesen/pingtunnel-encrypted/releases/download/latest/pingtunnel_linux_amd64.zip
-  unzip pingtunnel_linux_amd64.zip
-fi
-chmod +x pingtunnel
-mv pingtunnel /usr/local/bin/
-
-# Create pingtunnel systemd service
-cat > /etc/systemd/system/pingtunnel.service << 'PINGTUNNELSERVICE'
+# Install pingtunnel. The zip for this arch was downloaded to /tmp/pingtunnel.zip by the startup script,
+# in parallel with the package install. If that download failed, skip pingtunnel rather than taking
+# the rest of the setup down with it
+if [ -s /tmp/pingtunnel.zip ]; then
+  cd /tmp
+  unzip -o pingtunnel.zip
+  chmod +x pingtunnel
+  mv pingtunnel /usr/local/bin/
+
+  # Create pingtunnel systemd service
+  cat > /etc/systemd/system/pingtunnel.service << 'PINGTUNNELSERVICE'
 [Unit]
 Description=Pingtunnel Server
 After=network.target
@@ -34,17 +23,19 @@ RestartSec=10
 WantedBy=multi-user.target
 PINGTUNNELSERVICE
 
-# Disable system default ping to avoid conflicts
-echo 1 > /proc/sys/net/ipv4/icmp_echo_ignore_all
+  # Disable system default ping to avoid conflicts
+  echo 1 > /proc/sys/net/ipv4/icmp_echo_ignore_all
 
-# Add iptables rules
-iptables -I INPUT -p icmp --icmp-type 8 -j ACCEPT
+  # Add iptables rules
+  iptables -I INPUT -p icmp --icmp-type 8 -j ACCEPT
 
-# AI seems to think this is necessary, but I am less certain. Retained for reference
-#ETH0=$(ip -o -4 route show to default | awk '{print $5}')
-#iptables -t nat -A POSTROUTING -o $ETH0 -j MASQUERADE
+  # AI seems to think this is necessary, but I am less certain. Retained for reference
+  #ETH0=$(ip -o -4 route show to default | awk '{print $5}')
+  #iptables -t nat -A POSTROUTING -o $ETH0 -j MASQUERADE
 
-# Enable and start pingtunnel
-systemctl daemon-reload
-systemctl enable pingtunnel
-systemctl start pingtunnel 
+  # Started with the other services at the end of the startup script
+  SERVICES="$SERVICES pingtunnel"
+else
+  echo "WARN: /tmp/pingtunnel.zip is missing or empty, skipping pingtunnel" >&2
+  record_status pingtunnel skipped-download-failed
+fi
@@ -1,6 +1,4 @@
 # Configure tinyproxy to listen only on localhost
-DEBIAN_FRONTEND=noninteractive apt-get install -y tinyproxy apache2-utils stunnel4
-
 cat > /etc/tinyproxy/tinyproxy.conf << 'TINYPROXYCONF'
 User tinyproxy
 Group tinyproxy
@@ -35,9 +33,6 @@ ${https_proxy_external_key_pem}
 KEY
 %{else}
 %{if has_proxy_domain}
-# Install certbot for LetsEncrypt
-DEBIAN_FRONTEND=noninteractive apt-get install -y certbot openssl
-
 # Attempt to get LetsEncrypt certificate (non-fatal)
 certbot certonly --standalone --non-interactive --agree-tos --email admin@${https_proxy_domain} -d ${https_proxy_domain} || true
 
@@ -98,10 +93,7 @@ chmod 600 /etc/stunnel/stunnel.conf
 
 iptables -I INPUT -p tcp --dport 443 -j ACCEPT
 
-# Enable and start services
-systemctl enable stunnel4
-systemctl enable tinyproxy
-systemctl restart tinyproxy
-systemctl restart stunnel4
+# Started with the other services at the end of the startup script
+SERVICES="$SERVICES tinyproxy stunnel4"
 
 
@@ -0,0 +1,62 @@
+# QUIC proxy (TUIC v5) on UDP/443, alongside stunnel on TCP/443. Clients run tuic-client, which
+# exposes a local SOCKS5 proxy relayed over a single QUIC connection: no TCP head-of-line blocking,
+# 0-RTT resumption, and the connection survives the client changing address (eg. wifi -> mobile)
+# The binary for this arch was downloaded to /tmp/tuic-server by the startup script; if that
+# download failed, skip the QUIC proxy rather than taking the rest of the setup down with it
+if [ -s /tmp/tuic-server ]; then
+  install -m 755 /tmp/tuic-server /usr/local/bin/tuic-server
+
+  # QUIC runs in userspace, so give it bigger socket buffers than the (tiny) defaults
+  cat > /etc/sysctl.d/60-quic.conf << 'QUICSYSCTL'
+net.core.rmem_max = 7500000
+net.core.wmem_max = 7500000
+QUICSYSCTL
+  sysctl -p /etc/sysctl.d/60-quic.conf || true
+
+  # Reuse the HTTPS proxy's certificate, so set this up after proxy-setup
+  mkdir -p /etc/tuic
+  cat > /etc/tuic/server.json << 'TUICCONF'
+{
+  "server": "[::]:443",
+  "users": ${jsonencode({ (quic_proxy_uuid) = effective_proxy_password })},
+  "certificate": "/etc/stunnel/ssl/cert.pem",
+  "private_key": "/etc/stunnel/ssl/key.pem",
+  "congestion_control": "${quic_proxy_config.congestion_control}",
+  "alpn": ["h3"],
+  "zero_rtt_handshake": ${quic_proxy_config.zero_rtt},
+  "dual_stack": true,
+  "auth_timeout": "3s",
+  "max_idle_time": "30s",
+  "log_level": "warn"
+}
+TUICCONF
+  chmod 600 /etc/tuic/server.json
+
+  cat > /etc/systemd/system/tuic-server.service << 'TUICSERVICE'
+[Unit]
+Description=TUIC QUIC proxy server
+After=network.target stunnel4.service
+
+[Service]
+Type=simple
+ExecStart=/usr/local/bin/tuic-server -c /etc/tuic/server.json
+Restart=always
+RestartSec=10
+
+[Install]
+WantedBy=multi-user.target
+TUICSERVICE
+
+  # Pick up renewed Let's Encrypt certificates too
+  if [ -f /etc/letsencrypt/renewal-hooks/deploy/stunnel ]; then
+    echo "systemctl restart tuic-server || true" >> /etc/letsencrypt/renewal-hooks/deploy/stunnel
+  fi
+
+  iptables -I INPUT -p udp --dport 443 -j ACCEPT
+
+  # Started with the other services at the end of the startup script
+  SERVICES="$SERVICES tuic-server"
+else
+  echo "WARN: /tmp/tuic-server is missing or empty, skipping the QUIC proxy" >&2
+  record_status quic-proxy skipped-download-failed
+fi
@@ -4,23 +4,111 @@
 cloud_provider="${cloud_provider}"
 arch="${arch}"
 
+# Provisioning status: per-stage durations in seconds, as key=value lines.
+# Also mirrored to guest attributes on Google so they can be read without SSH.
+PROVISION_STATUS_FILE="${provision_status_file}"
+mkdir -p "$(dirname "$PROVISION_STATUS_FILE")"
+: > "$PROVISION_STATUS_FILE"
+PROVISION_START=$(date +%s)
+
+record_status() {
+  echo "$1=$2" >> "$PROVISION_STATUS_FILE"
+  if [ "${cloud_provider}" = "google" ]; then
+    curl -s --max-time 5 -X PUT -H "Metadata-Flavor: Google" --data "$2" http://metadata.google.internal/computeMetadata/v1/instance/guest-attributes/${vm_guest_attr_namespace}/provision-$1 > /dev/null || true
+  fi
+}
+
+stage_begin() {
+  STAGE_NAME="$1"
+  STAGE_START=$(date +%s)
+}
+
+stage_end() {
+  record_status "stage-$STAGE_NAME-seconds" $(( $(date +%s) - STAGE_START ))
+}
+
+# apt-get that waits for the dpkg lock (cloud-init and unattended-upgrades like to hold it at boot)
+# and retries, rather than falling over part way through setup
+apt_get() {
+  for attempt in 1 2 3 4 5; do
+    if DEBIAN_FRONTEND=noninteractive apt-get -o DPkg::Lock::Timeout=300 "$@"; then
+      return 0
+    fi
+    echo "WARN: apt-get $* failed (attempt $attempt/5), retrying" >&2
+    sleep $(( attempt * 10 ))
+  done
+  echo "ERROR: apt-get $* failed after 5 attempts" >&2
+  return 1
+}
+
+record_status started-at "$PROVISION_START"
+
+# Services are configured by the feature sections below, then (re)started together at the end.
+# The provider setup turns on errexit, so if anything fails part way through, the trap still
+# starts whatever had been configured by then instead of leaving the VM with nothing running
+SERVICES=""
+
+start_services() {
+  stage_begin services
+  systemctl daemon-reload
+  # Enable one at a time, as one refusal (eg. a unit whose package didn't install, or an alias name,
+  # which systemd won't enable) fails the whole batch
+  for service in $SERVICES; do
+    if ! systemctl enable "$service"; then
+      echo "WARN: could not enable $service" >&2
+      echo "service-$service-enable=failed" >> "$PROVISION_STATUS_FILE"
+    fi
+  done
+  # Restart in one go so systemd runs the jobs in parallel, falling back to one at a time so a
+  # single broken unit doesn't hold back the rest
+  if ! systemctl restart $SERVICES; then
+    echo "WARN: not all services started: $SERVICES" >&2
+    for service in $SERVICES; do
+      systemctl restart "$service" || echo "WARN: could not start $service" >&2
+    done
+  fi
+  for service in $SERVICES; do
+    echo "service-$service=$(systemctl is-active "$service")" >> "$PROVISION_STATUS_FILE"
+  done
+  stage_end
+}
+trap start_services EXIT
+
 # Custom pre-configuration commands
 %{if custom_pre_config != ""}
+stage_begin pre-config
 # User-provided pre-configuration
 ${custom_pre_config}
+stage_end
 %{endif}
 
 #Flush forward rules, as some providers muck with the defaults
 iptables -F FORWARD
 iptables -A FORWARD -j ACCEPT
 
-# Update package lists
-DEBIAN_FRONTEND=noninteractive apt-get update -o DPkg::Timeout::=10
-
-# Install required packages non-interactively
-DEBIAN_FRONTEND=noninteractive apt-get install -y htop netcat-traditional
+# Start binary downloads in the background so they overlap with the package install. Each goes to
+# a .part file that's only moved into place once complete, so a failed download leaves nothing
+# behind for the feature's "is it there" check to mistake for the real thing
+DOWNLOAD_PIDS=""
+%{for dest, url in downloads ~}
+(curl -fsSL --retry 5 --retry-delay 5 -o ${dest}.part ${url} && mv ${dest}.part ${dest} || { rm -f ${dest}.part; exit 1; }) &
+DOWNLOAD_PIDS="$DOWNLOAD_PIDS $!"
+%{endfor ~}
+
+# Install every enabled feature's packages in one transaction
+stage_begin packages
+apt_get update -o DPkg::Timeout::=10
+apt_get install -y ${join(" ", packages)}
+stage_end
+
+stage_begin downloads
+for pid in $DOWNLOAD_PIDS; do
+  wait "$pid" || echo "WARN: background download (pid $pid) failed" >&2
+done
+stage_end
 
 # Provider-specific startup steps
+stage_begin provider
 %{if cloud_provider == "google"}
 ${templatefile("${path}/templates/google-provider-setup.sh.tpl", {})}
 %{endif}
@@ -28,28 +116,34 @@ ${templatefile("${path}/templates/google-provider-setup.sh.tpl", {})}
 %{if cloud_provider == "oracle"}
 ${templatefile("${path}/templates/oracle-provider-setup.sh.tpl", {})}
 %{endif}
+stage_end
 
 # Include feature-specific configurations
 %{if wireguard_enabled}
 #We do wireguard first so as to get the wireguard public key into the guest attributes ASAP
+stage_begin wireguard
 ${templatefile("${path}/templates/wireguard-setup.sh.tpl", {
   wireguard_private_key = wireguard_private_key,
   vm_guest_attr_namespace = vm_guest_attr_namespace,
   wg_pubkey_attr_key = wg_pubkey_attr_key,
   wireguard_server_ip = wireguard_server_ip,
   wireguard_config = wireguard_config
+  wireguard_peers = wireguard_peers
   cloud_provider = cloud_provider
 })}
+stage_end
 %{endif}
 
 %{if pingtunnel_enabled}
+stage_begin pingtunnel
 ${templatefile("${path}/templates/pingtunnel-setup.sh.tpl", {
   pingtunnel_key = pingtunnel_key
   pingtunnel_aes_key = pingtunnel_aes_key
-  arch = arch
 })}
+stage_end
 %{endif}
 
+stage_begin proxy
 ${templatefile("${path}/templates/proxy-setup.sh.tpl", {
   effective_proxy_password = effective_proxy_password,
   has_proxy_domain = has_proxy_domain,
@@ -61,8 +155,20 @@ ${templatefile("${path}/templates/proxy-setup.sh.tpl", {
   has_external_https_cert = has_external_https_cert,
   https_proxy_username = https_proxy_username
 })}
+stage_end
+
+%{if quic_proxy_enabled}
+stage_begin quic-proxy
+${templatefile("${path}/templates/quic-proxy-setup.sh.tpl", {
+  quic_proxy_uuid = quic_proxy_uuid,
+  quic_proxy_config = quic_proxy_config,
+  effective_proxy_password = effective_proxy_password
+})}
+stage_end
+%{endif}
 
 # Configure SSH to listen on multiple ports
+stage_begin ssh
 # Remove any existing Port directives to avoid conflicts
 sed -i '/^Port /d' /etc/ssh/sshd_config
 
@@ -76,15 +182,19 @@ iptables -I INPUT -p tcp --dport ${port} -j ACCEPT
 systemctl daemon-reload
 systemctl restart ssh.socket
 systemctl restart ssh
+stage_end
 
 %{if dns_tunnel_enabled}
+stage_begin dns-tunnel
 ${templatefile("${path}/templates/dns-tunnel-setup.sh.tpl", {
   effective_dns_password = effective_dns_password,
   dns_tunnel_config = dns_tunnel_config
 })}
+stage_end
 %{endif}
 
 %{if ipsec_vpn_enabled}
+stage_begin ipsec
 ${templatefile("${path}/templates/ipsec-vpn-setup.sh.tpl", {
   vpn_client_ip_start = vpn_client_ip_start,
   vpn_client_ip_end = vpn_client_ip_end,
@@ -93,9 +203,29 @@ ${templatefile("${path}/templates/ipsec-vpn-setup.sh.tpl", {
   effective_vpn_password = effective_vpn_password,
   effective_ipsec_psk = effective_ipsec_psk
 })}
+stage_end
 %{endif}
 
+stage_begin egress-accounting
+${templatefile("${path}/templates/egress-accounting-setup.sh.tpl", {
+  egress_status_file = egress_status_file,
+  egress_limit_bytes = egress_limit_bytes,
+  cloud_provider = cloud_provider,
+  vm_guest_attr_namespace = vm_guest_attr_namespace
+})}
+stage_end
+
+# Enable and (re)start all configured services
+trap - EXIT
+start_services
+
 %{if custom_post_config != ""}
+stage_begin post-config
 # User-provided post-configuration
 ${custom_post_config}
+stage_end
 %{endif}
+
+record_status provision-seconds $(( $(date +%s) - PROVISION_START ))
+record_status boot-to-ready-seconds "$(cut -d. -f1 /proc/uptime)"
+record_status ready "$(date +%s)"
@@ -1,3 +1,4 @@
+# ${peer_name}
 [Interface]
 Address = ${client_ip}
 # PrivateKey = <insert your client private key here>
@@ -5,4 +6,5 @@ Address = ${client_ip}
 [Peer]
 PublicKey = ${server_pubkey}
 Endpoint = ${server_ip}:${server_port}
+AllowedIPs = ${allowed_ips}
 PersistentKeepalive = 25
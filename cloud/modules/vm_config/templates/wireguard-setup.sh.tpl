@@ -1,5 +1,4 @@
-# Install WireGuard
-DEBIAN_FRONTEND=noninteractive apt-get install -y wireguard
+# WireGuard itself is installed with the rest of the packages by the startup script
 
 # Convert private key from PEM to wg format.
 echo "${wireguard_private_key}" > /etc/wireguard/private.pem && openssl pkey -in /etc/wireguard/private.pem -outform DER -out private_key.der && dd if=private_key.der bs=1 skip=$(($(stat -c %s private_key.der) - 32)) count=32 2>/dev/null | base64 > /etc/wireguard/private.key
@@ -17,10 +16,13 @@ cat > /etc/wireguard/wg0.conf << WIREGUARDCONF
 PrivateKey = $(cat /etc/wireguard/private.key)
 Address = ${wireguard_server_ip}
 ListenPort = ${wireguard_config.port}
+%{ for peer in wireguard_peers ~}
 
 [Peer]
-PublicKey = ${wireguard_config.client_public_key}
-AllowedIPs = ${wireguard_config.client_ip}
+# ${peer.name}
+PublicKey = ${peer.public_key}
+AllowedIPs = ${peer.tunnel_ip}
+%{ endfor ~}
 
 WIREGUARDCONF
 chmod 600 /etc/wireguard/wg0.conf
@@ -34,6 +36,5 @@ iptables -I INPUT -p udp --dport ${wireguard_config.port} -j ACCEPT
 iptables -I INPUT -i wg0 -j ACCEPT
 iptables -t nat -A POSTROUTING -o $(ls /sys/class/net/ | grep en) -j MASQUERADE
 
-# Enable and start WireGuard
-systemctl enable wg-quick@wg0
-systemctl start wg-quick@wg0 
+# Started with the other services at the end of the startup script
+SERVICES="$SERVICES wg-quick@wg0" 
@@ -16,6 +16,12 @@ variable "arch" {
   default     = "x86_64"
 }
 
+variable "egress_limit_gb" {
+  description = "Monthly outbound transfer allowance of the provider's free tier, in GB. Used for egress accounting and month-end projections; 0 means no limit"
+  type        = number
+  default     = 0
+}
+
 variable "ssh_keys" {
   description = "SSH keys for the VM."
   type        = string
@@ -89,6 +95,20 @@ variable "https_proxy_secrets" {
   }
 }
 
+variable "quic_proxy_config" {
+  description = "Configuration for the QUIC (TUIC v5) proxy on UDP/443. Shares the HTTPS proxy's certificate and password"
+  type = object({
+    enable             = optional(bool, false)
+    zero_rtt           = optional(bool, true)
+    congestion_control = optional(string, "bbr")
+  })
+  default = {}
+  validation {
+    condition     = contains(["bbr", "cubic", "new_reno"], var.quic_proxy_config.congestion_control)
+    error_message = "congestion_control must be one of bbr, cubic or new_reno"
+  }
+}
+
 variable "ipsec_vpn_config" {
   description = "Configuration for the IPSec VPN"
   type = object({
@@ -114,14 +134,34 @@ variable "ipsec_vpn_secrets" {
 variable "wireguard_config" {
   description = "Configuration for WireGuard VPN"
   type = object({
-    enable            = optional(bool, true)
-    port              = optional(string, "51820")
-    client_ip         = optional(string, "10.0.0.2/24")
-    client_public_key = optional(string, "")
+    enable             = optional(bool, true)
+    port               = optional(string, "51820")
+    client_ip          = optional(string, "10.0.0.2/24")
+    client_public_key  = optional(string, "")
+    client_allowed_ips = optional(string, "0.0.0.0/0")
+    address_pool       = optional(string, "")
+    peers = optional(list(object({
+      name        = string
+      public_key  = string
+      address     = optional(string, "")
+      allowed_ips = optional(string, "0.0.0.0/0")
+    })), [])
   })
   default = {
     enable = true
   }
+  validation {
+    condition     = var.wireguard_config.address_pool == "" || can(cidrhost(var.wireguard_config.address_pool, 0))
+    error_message = "If provided, address_pool must be a valid CIDR range"
+  }
+  validation {
+    condition     = alltrue([for peer in var.wireguard_config.peers : can(regex("^[A-Za-z0-9+/]{43}=$", peer.public_key))])
+    error_message = "Each peer must have a valid base64-encoded public_key"
+  }
+  validation {
+    condition     = length(distinct([for peer in var.wireguard_config.peers : peer.name])) == length(var.wireguard_config.peers)
+    error_message = "Peer names must be unique"
+  }
 }
 
 variable "enable_pingtunnel" {
@@ -13,12 +13,14 @@ output "aws_lambda_aes_key" {
 output "google_vm" {
   description = "Google Cloud VM non-sensitive details"
   value = length(module.google) > 0 ? {
-    vm_instance_name = module.google[0].vm_instance_name
-    ip_address       = module.google[0].vm_ip_address
-    ipsec_vpn        = module.google[0].ipsec_vpn
-    fqdn             = module.google[0].vm_fqdn
-    ssh_public_key   = module.google[0].generated_ssh_public_key
-    https_proxy      = module.google[0].https_proxy
+    vm_instance_name  = module.google[0].vm_instance_name
+    ip_address        = module.google[0].vm_ip_address
+    ipsec_vpn         = module.google[0].ipsec_vpn
+    fqdn              = module.google[0].vm_fqdn
+    ssh_public_key    = module.google[0].generated_ssh_public_key
+    https_proxy       = module.google[0].https_proxy
+    dns_tunnel_domain = module.google[0].dns_tunnel_domain
+    egress            = module.google[0].egress
   } : null
 }
 
@@ -32,6 +34,8 @@ output "google_vm_secrets" {
     pingtunnel_aes_key  = module.google[0].pingtunnel_aes_key
     wireguard           = module.google[0].wireguard
     https_proxy_secrets = module.google[0].https_proxy_secrets
+    dns_tunnel_password = module.google[0].dns_tunnel_password
+    quic_proxy          = module.google[0].quic_proxy
   } : null
   sensitive = true
 }
@@ -40,13 +44,14 @@ output "google_vm_secrets" {
 output "oracle_vm" {
   description = "Oracle Cloud VM non-sensitive details"
   value = length(module.oracle) > 0 ? {
-    ip_address     = module.oracle[0].vm_ip_address
-    ipv6_address   = module.oracle[0].vm_ipv6_address
-    ipsec_vpn      = module.oracle[0].ipsec_vpn
-    fqdn           = module.oracle[0].vm_fqdn
-    instance_id    = module.oracle[0].instance_id
-    ssh_public_key = module.oracle[0].generated_ssh_public_key
-    https_proxy    = module.oracle[0].https_proxy
+    ip_address        = module.oracle[0].vm_ip_address
+    ipv6_address      = module.oracle[0].vm_ipv6_address
+    ipsec_vpn         = module.oracle[0].ipsec_vpn
+    fqdn              = module.oracle[0].vm_fqdn
+    instance_id       = module.oracle[0].instance_id
+    ssh_public_key    = module.oracle[0].generated_ssh_public_key
+    https_proxy       = module.oracle[0].https_proxy
+    dns_tunnel_domain = module.oracle[0].dns_tunnel_domain
   } : null
 }
 
@@ -60,6 +65,8 @@ output "oracle_vm_secrets" {
     pingtunnel_aes_key  = module.oracle[0].pingtunnel_aes_key
     wireguard           = module.oracle[0].wireguard
     https_proxy_secrets = module.oracle[0].https_proxy_secrets
+    dns_tunnel_password = module.oracle[0].dns_tunnel_password
+    quic_proxy          = module.oracle[0].quic_proxy
   } : null
   sensitive = true
 }
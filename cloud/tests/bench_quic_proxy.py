@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+QUIC Proxy vs HTTPS Proxy Benchmark
+
+Compares the QUIC proxy (tuic-server on UDP/443) against the HTTPS proxy
+(stunnel in front of tinyproxy on TCP/443) on a local stand-in network, so
+results don't depend on whatever the path to the VMs is doing today:
+
+    client namespace  <-- veth, netem delay + loss -->  vm namespace
+    curl, tuic-client                                   stunnel, tinyproxy, tuic-server,
+                                                        HTTP origin on 127.0.0.1
+
+For each loss rate it measures:
+
+    * handshake: time to the first byte of a small proxied response over a
+      fresh connection (TCP + TLS + CONNECT for stunnel, QUIC + auth for TUIC)
+    * reconnect: the same, for TUIC after its idle connection has been closed,
+      which is where 0-RTT resumption kicks in
+    * throughput: download rate of a larger file through the proxy
+
+and finally whether a download survives the client changing its address
+part way through (QUIC connection migration vs a TCP connection).
+
+Usage:
+    sudo python bench_quic_proxy.py [--loss 0,1,3,5] [--delay 25] [--trials 5] [--size-mb 8]
+
+Requirements:
+    * root, for network namespaces and tc/netem
+    * curl, openssl, stunnel4 and tinyproxy (`apt install curl openssl stunnel4 tinyproxy`)
+    * tuic-server and tuic-client on PATH, or --tuic-dir; from https://github.com/EAimTY/tuic/releases
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from test_vm_services import GREEN, RED, YELLOW, RESET, format_bytes
+
+
+VM_NS = "fcv-bench-vm"
+CLIENT_NS = "fcv-bench-client"
+VM_IF = "fcvb-vm"
+CLIENT_IF = "fcvb-client"
+VM_IP = "10.211.0.1"
+CLIENT_IP = "10.211.0.2"
+CLIENT_MIGRATED_IP = "10.211.0.3"
+PREFIX = 24
+
+ORIGIN_PORT = 8000
+SOCKS_PORT = 1080
+PROXY_USER = "bench"
+SERVER_NAME = "bench.local"
+# Short, so the reconnect measurement doesn't have to wait long for the connection to idle out
+QUIC_IDLE_SECONDS = 2
+# The migration test moves the client's address 2s into a download that takes about this long
+MIGRATION_TRANSFER_SECONDS = 10
+
+
+@dataclass
+class TransportResult:
+    """Measurements for one transport at one loss rate"""
+    transport: str
+    loss: float
+    handshake_ms: List[float] = field(default_factory=list)
+    reconnect_ms: List[float] = field(default_factory=list)
+    throughput_bps: List[float] = field(default_factory=list)
+    failures: int = 0
+
+    @staticmethod
+    def median(values: List[float]) -> Optional[float]:
+        return statistics.median(values) if values else None
+
+
+class ProxyBenchmark:
+    """Runs both proxies in a pair of network namespaces and measures them with curl"""
+
+    def __init__(self, workdir: str, tuic_dir: Optional[str] = None, delay_ms: int = 25,
+                 trials: int = 5, size_mb: int = 8, congestion_control: str = "bbr"):
+        self.workdir = workdir
+        self.tuic_dir = tuic_dir
+        self.delay_ms = delay_ms
+        self.trials = trials
+        self.size_bytes = size_mb * 1024 * 1024
+        self.congestion_control = congestion_control
+        self.password = uuid.uuid4().hex
+        self.uuid = str(uuid.uuid4())
+        self.processes: List[subprocess.Popen] = []
+        self.tuic_client: Optional[subprocess.Popen] = None
+
+    # --- environment -------------------------------------------------------
+
+    def find_binary(self, *names: str) -> Optional[str]:
+        for name in names:
+            if self.tuic_dir and os.access(os.path.join(self.tuic_dir, name), os.X_OK):
+                return os.path.join(self.tuic_dir, name)
+            path = shutil.which(name)
+            if path:
+                return path
+        return None
+
+    def check_requirements(self) -> bool:
+        ok = True
+        if os.geteuid() != 0:
+            print(f"{RED}Network namespaces and netem need root. Re-run with sudo.{RESET}")
+            ok = False
+        self.binaries = {
+            "ip": self.find_binary("ip"),
+            "tc": self.find_binary("tc"),
+            "curl": self.find_binary("curl"),
+            "openssl": self.find_binary("openssl"),
+            "stunnel": self.find_binary("stunnel4", "stunnel"),
+            "tinyproxy": self.find_binary("tinyproxy"),
+            "tuic-server": self.find_binary("tuic-server"),
+            "tuic-client": self.find_binary("tuic-client"),
+        }
+        for name, path in self.binaries.items():
+            if not path:
+                print(f"{RED}{name} not found (see the requirements at the top of this script){RESET}")
+                ok = False
+        return ok
+
+    def run(self, *cmd: str, ns: Optional[str] = None, check: bool = True) -> subprocess.CompletedProcess:
+        if ns:
+            cmd = ("ip", "netns", "exec", ns) + cmd
+        return subprocess.run(cmd, capture_output=True, text=True, check=check)
+
+    def spawn(self, *cmd: str, ns: str) -> subprocess.Popen:
+        proc = subprocess.Popen(("ip", "netns", "exec", ns) + cmd,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.processes.append(proc)
+        return proc
+
+    def wait_for_port(self, ns: str, port: int, udp: bool = False, timeout: float = 10) -> bool:
+        flag = "-lnu" if udp else "-lnt"
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            out = self.run("ss", flag, ns=ns, check=False).stdout
+            if f":{port} " in out:
+                return True
+            time.sleep(0.1)
+        return False
+
+    def setup_network(self):
+        self.teardown_network()
+        self.run("ip", "netns", "add", VM_NS)
+        self.run("ip", "netns", "add", CLIENT_NS)
+        self.run("ip", "link", "add", VM_IF, "netns", VM_NS, "type", "veth", "peer", CLIENT_IF, "netns", CLIENT_NS)
+        for ns, iface, ip in [(VM_NS, VM_IF, VM_IP), (CLIENT_NS, CLIENT_IF, CLIENT_IP)]:
+            self.run("ip", "link", "set", "lo", "up", ns=ns)
+            self.run("ip", "addr", "add", f"{ip}/{PREFIX}", "dev", iface, ns=ns)
+            self.run("ip", "link", "set", iface, "up", ns=ns)
+            # Same socket buffer sizes the VM gets (see quic-proxy-setup.sh.tpl)
+            self.run("sysctl", "-q", "-w", "net.core.rmem_max=7500000", "net.core.wmem_max=7500000", ns=ns)
+        # Keep the migrated address when the original one is removed
+        self.run("sysctl", "-q", "-w", f"net.ipv4.conf.{CLIENT_IF}.promote_secondaries=1", ns=CLIENT_NS)
+
+    def set_link(self, loss: float, rate_kbit: Optional[int] = None):
+        """Delay and loss are applied in each direction, so the RTT is twice the delay"""
+        rate = ["rate", f"{rate_kbit}kbit"] if rate_kbit else []
+        for ns, iface in [(VM_NS, VM_IF), (CLIENT_NS, CLIENT_IF)]:
+            self.run("tc", "qdisc", "replace", "dev", iface, "root", "netem",
+                     "delay", f"{self.delay_ms}ms", "loss", f"{loss}%", *rate, ns=ns)
+
+    def teardown_network(self):
+        for ns in (VM_NS, CLIENT_NS):
+            self.run("ip", "netns", "del", ns, check=False)
+
+    # --- servers -----------------------------------------------------------
+
+    def write(self, name: str, content: str) -> str:
+        path = os.path.join(self.workdir, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def start_servers(self):
+        wd = self.workdir
+        os.chmod(wd, 0o755)
+        with open(os.path.join(wd, "small"), "wb") as f:
+            f.write(os.urandom(1024))
+        with open(os.path.join(wd, "large"), "wb") as f:
+            f.write(os.urandom(self.size_bytes))
+        self.spawn(sys.executable, "-m", "http.server", str(ORIGIN_PORT), "--bind", "127.0.0.1",
+                   "--directory", wd, ns=VM_NS)
+
+        cert, key = os.path.join(wd, "cert.pem"), os.path.join(wd, "key.pem")
+        self.run(self.binaries["openssl"], "req", "-x509", "-newkey", "ec", "-pkeyopt", "ec_paramgen_curve:prime256v1",
+                 "-nodes", "-days", "1", "-subj", f"/CN={SERVER_NAME}", "-addext", f"subjectAltName=DNS:{SERVER_NAME}",
+                 "-keyout", key, "-out", cert)
+
+        # The same shape of config the VM uses (see proxy-setup.sh.tpl), minus logging and pid files
+        tinyproxy_conf = self.write("tinyproxy.conf", "\n".join([
+            "User nobody", "Group nogroup", "Port 8888", "Listen 127.0.0.1", "Timeout 600",
+            "MaxClients 100", "Allow 127.0.0.1", f"BasicAuth {PROXY_USER} {self.password}", "",
+        ]))
+        self.spawn(self.binaries["tinyproxy"], "-d", "-c", tinyproxy_conf, ns=VM_NS)
+        stunnel_conf = self.write("stunnel.conf", "\n".join([
+            "foreground = yes", "pid =", "", "[https]", "accept = 443", "connect = 127.0.0.1:8888",
+            f"cert = {cert}", f"key = {key}", "TIMEOUTclose = 0", "sslVersionMin = TLSv1.2", "",
+        ]))
+        self.spawn(self.binaries["stunnel"], stunnel_conf, ns=VM_NS)
+
+        # As quic-proxy-setup.sh.tpl, with a short idle timeout for the reconnect measurement
+        tuic_server_conf = self.write("tuic-server.json", json.dumps({
+            "server": "0.0.0.0:443",
+            "users": {self.uuid: self.password},
+            "certificate": cert,
+            "private_key": key,
+            "congestion_control": self.congestion_control,
+            "alpn": ["h3"],
+            "zero_rtt_handshake": True,
+            "auth_timeout": "3s",
+            "max_idle_time": f"{QUIC_IDLE_SECONDS}s",
+            "log_level": "warn",
+        }, indent=2))
+        self.spawn(self.binaries["tuic-server"], "-c", tuic_server_conf, ns=VM_NS)
+        self.tuic_client_conf = self.write("tuic-client.json", json.dumps({
+            "relay": {
+                "server": f"{SERVER_NAME}:443",
+                "uuid": self.uuid,
+                "password": self.password,
+                "ip": VM_IP,
+                "certificates": [cert],
+                "congestion_control": self.congestion_control,
+                "alpn": ["h3"],
+                "zero_rtt_handshake": True,
+            },
+            "local": {"server": f"127.0.0.1:{SOCKS_PORT}"},
+            "log_level": "warn",
+        }, indent=2))
+
+        for port, udp in [(ORIGIN_PORT, False), (8888, False), (443, False), (443, True)]:
+            if not self.wait_for_port(VM_NS, port, udp=udp):
+                raise RuntimeError(f"server on {'udp' if udp else 'tcp'}/{port} didn't start")
+
+    def restart_tuic_client(self):
+        """A new client process has no session tickets, so its first request does a full handshake"""
+        self.stop_tuic_client()
+        self.tuic_client = self.spawn(self.binaries["tuic-client"], "-c", self.tuic_client_conf, ns=CLIENT_NS)
+        if not self.wait_for_port(CLIENT_NS, SOCKS_PORT):
+            raise RuntimeError("tuic-client didn't start")
+
+    def stop_tuic_client(self):
+        if self.tuic_client:
+            self.tuic_client.terminate()
+            self.tuic_client.wait()
+            self.processes.remove(self.tuic_client)
+            self.tuic_client = None
+
+    def stop_servers(self):
+        for proc in self.processes:
+            proc.terminate()
+        for proc in self.processes:
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        self.processes = []
+        self.tuic_client = None
+
+    # --- measurements ------------------------------------------------------
+
+    def curl_args(self, transport: str) -> List[str]:
+        if transport == "https":
+            return ["--proxy", f"https://{VM_IP}:443", "--proxy-insecure", "--proxytunnel",
+                    "--proxy-user", f"{PROXY_USER}:{self.password}"]
+        return ["--socks5-hostname", f"127.0.0.1:{SOCKS_PORT}"]
+
+    def fetch(self, transport: str, path: str, timeout: int = 60, extra: Optional[List[str]] = None) -> Optional[Dict[str, float]]:
+        """Fetch a file from the origin through the proxy; returns curl's timings, or None on failure"""
+        cmd = [self.binaries["curl"], "-s", "-o", "/dev/null", "--max-time", str(timeout),
+               "-w", "%{http_code} %{time_starttransfer} %{time_total} %{size_download}"]
+        cmd += self.curl_args(transport) + (extra or []) + [f"http://127.0.0.1:{ORIGIN_PORT}/{path}"]
+        result = self.run(*cmd, ns=CLIENT_NS, check=False)
+        fields = result.stdout.split()
+        if result.returncode != 0 or len(fields) != 4 or fields[0] != "200":
+            return None
+        return {"ttfb": float(fields[1]), "total": float(fields[2]), "bytes": float(fields[3])}
+
+    def measure(self, transport: str, loss: float) -> TransportResult:
+        res = TransportResult(transport=transport, loss=loss)
+        for _ in range(self.trials):
+            if transport == "quic":
+                self.restart_tuic_client()
+            timing = self.fetch(transport, "small")
+            if timing:
+                res.handshake_ms.append(timing["ttfb"] * 1000)
+            else:
+                res.failures += 1
+
+            if transport == "quic":
+                # Let the server close the idle connection, so the next request has to reconnect (0-RTT)
+                time.sleep(QUIC_IDLE_SECONDS + 1)
+                timing = self.fetch(transport, "small")
+                if timing:
+                    res.reconnect_ms.append(timing["ttfb"] * 1000)
+                else:
+                    res.failures += 1
+
+            if transport == "quic":
+                self.restart_tuic_client()
+            timing = self.fetch(transport, "large", timeout=300)
+            if timing and timing["total"] > 0:
+                res.throughput_bps.append(timing["bytes"] / timing["total"])
+            else:
+                res.failures += 1
+        self.stop_tuic_client()
+        return res
+
+    def migration_survives(self, transport: str) -> bool:
+        """Download the large file over a slow link and move the client to a new address part way through"""
+        if transport == "quic":
+            self.restart_tuic_client()
+        # Throttle the link itself rather than curl, so the data is still in flight when the address changes
+        self.set_link(0, rate_kbit=max(256, self.size_bytes * 8 // 1000 // MIGRATION_TRANSFER_SECONDS))
+        cmd = ["ip", "netns", "exec", CLIENT_NS, self.binaries["curl"], "-s", "-o", "/dev/null",
+               "--max-time", str(MIGRATION_TRANSFER_SECONDS * 4), "-w", "%{http_code} %{size_download}"]
+        cmd += self.curl_args(transport) + [f"http://127.0.0.1:{ORIGIN_PORT}/large"]
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        time.sleep(2)
+        self.run("ip", "addr", "add", f"{CLIENT_MIGRATED_IP}/{PREFIX}", "dev", CLIENT_IF, ns=CLIENT_NS)
+        self.run("ip", "addr", "del", f"{CLIENT_IP}/{PREFIX}", "dev", CLIENT_IF, ns=CLIENT_NS)
+        out, _ = proc.communicate()
+        # Move back for the next run
+        self.run("ip", "addr", "add", f"{CLIENT_IP}/{PREFIX}", "dev", CLIENT_IF, ns=CLIENT_NS)
+        self.run("ip", "addr", "del", f"{CLIENT_MIGRATED_IP}/{PREFIX}", "dev", CLIENT_IF, ns=CLIENT_NS)
+        self.set_link(0)
+        self.stop_tuic_client()
+        fields = out.split()
+        return proc.returncode == 0 and len(fields) == 2 and fields[0] == "200" and int(fields[1]) == self.size_bytes
+
+    # --- driver ------------------------------------------------------------
+
+    @staticmethod
+    def format_ms(value: Optional[float]) -> str:
+        return f"{value:.0f} ms" if value is not None else "-"
+
+    def report(self, results: List[TransportResult]):
+        print("\n" + "=" * 72)
+        print(f"RESULTS (RTT {2 * self.delay_ms} ms, median of {self.trials})")
+        print("=" * 72)
+        print(f"{'loss':>5}  {'transport':<22} {'handshake':>10} {'reconnect':>10} {'throughput':>13}  failures")
+        for res in results:
+            label = "https (stunnel+tinyproxy)" if res.transport == "https" else "quic (tuic)"
+            throughput = TransportResult.median(res.throughput_bps)
+            throughput_str = f"{format_bytes(throughput)}/s" if throughput is not None else "-"
+            failures = f"{RED}{res.failures}{RESET}" if res.failures else "0"
+            print(f"{res.loss:>4g}%  {label:<22} {self.format_ms(TransportResult.median(res.handshake_ms)):>10} "
+                  f"{self.format_ms(TransportResult.median(res.reconnect_ms)):>10} {throughput_str:>13}  {failures}")
+
+    def run_all(self, losses: List[float]) -> int:
+        print("Free Cloud VPN - QUIC vs HTTPS Proxy Benchmark")
+        print("=" * 50)
+        if not self.check_requirements():
+            return 1
+
+        results: List[TransportResult] = []
+        try:
+            self.setup_network()
+            self.start_servers()
+            for loss in losses:
+                self.set_link(loss)
+                for transport in ("https", "quic"):
+                    print(f"  {transport} at {loss:g}% loss...")
+                    results.append(self.measure(transport, loss))
+
+            print("\nConnection migration (client address changes mid-download)")
+            print("-" * 50)
+            for transport in ("https", "quic"):
+                survived = self.migration_survives(transport)
+                status = f"{GREEN}survived{RESET}" if survived else f"{YELLOW}dropped{RESET}"
+                print(f"  {transport}: {status}")
+        except (subprocess.CalledProcessError, RuntimeError) as e:
+            detail = e.stderr.strip() if isinstance(e, subprocess.CalledProcessError) and e.stderr else e
+            print(f"{RED}Benchmark setup failed: {detail}{RESET}")
+            return 1
+        finally:
+            self.stop_servers()
+            self.teardown_network()
+
+        self.report(results)
+        return 0
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Compare the QUIC proxy with the HTTPS proxy under packet loss")
+    parser.add_argument("--loss", default="0,1,3,5", help="Comma-separated packet loss percentages to test")
+    parser.add_argument("--delay", type=int, default=25, help="One-way delay in ms added in each direction")
+    parser.add_argument("--trials", type=int, default=5, help="Measurements per transport and loss rate")
+    parser.add_argument("--size-mb", type=int, default=8, help="Size of the throughput test download")
+    parser.add_argument("--congestion-control", choices=["bbr", "cubic", "new_reno"], default="bbr",
+                        help="Congestion control for the QUIC proxy, as in quic_proxy_config")
+    parser.add_argument("--tuic-dir", help="Directory containing tuic-server and tuic-client, if not on PATH")
+    args = parser.parse_args()
+
+    losses = [float(loss) for loss in args.loss.split(",") if loss.strip()]
+    with tempfile.TemporaryDirectory(prefix="quic-bench-") as workdir:
+        bench = ProxyBenchmark(workdir, tuic_dir=args.tuic_dir, delay_ms=args.delay, trials=args.trials,
+                               size_mb=args.size_mb, congestion_control=args.congestion_control)
+        return bench.run_all(losses)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -22,13 +22,14 @@ from re import VERBOSE
 import socket
 import subprocess
 import sys
+import time
 import requests
 import ssl
 import socket
 import urllib3
 from requests.exceptions import RequestException
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
 
 
@@ -38,6 +39,11 @@ RED = "\033[91m"
 YELLOW = "\033[93m"
 RESET = "\033[0m"
 
+# Written by the VM startup script (see cloud/modules/vm_config/templates/startup-script.sh.tpl)
+PROVISION_STATUS_FILE = "/var/lib/free-cloud-vpn/provision-status"
+# Written by the egress-accounting timer (see cloud/modules/vm_config/templates/egress-accounting-setup.sh.tpl)
+EGRESS_STATUS_FILE = "/var/lib/free-cloud-vpn/egress-status"
+
 try:
     from dotenv import load_dotenv
     import paramiko
@@ -66,6 +72,46 @@ class VMInfo:
     services: List[ServiceConfig]
 
 
+@dataclass
+class WireGuardPeerStats:
+    """Per-peer counters as reported by `wg show <iface> dump`"""
+    name: str
+    public_key: str
+    endpoint: Optional[str]
+    allowed_ips: str
+    latest_handshake: int  # unix timestamp, 0 if never
+    rx_bytes: int
+    tx_bytes: int
+
+    @property
+    def handshake_age(self) -> Optional[int]:
+        """Seconds since the last handshake, or None if the peer has never connected"""
+        if not self.latest_handshake:
+            return None
+        return max(0, int(time.time()) - self.latest_handshake)
+
+
+def format_bytes(num: float) -> str:
+    """Human-readable byte count"""
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if abs(num) < 1024:
+            return f"{num:.1f} {unit}"
+        num /= 1024
+    return f"{num:.1f} TiB"
+
+
+def egress_weights(usage: Dict[str, Tuple[int, int]]) -> Dict[str, float]:
+    """Share of traffic to send to each provider, given (projected month-end bytes, limit bytes).
+
+    Weighted by the headroom left at the projected month end, so the VM furthest from its
+    free tier allowance takes the most traffic and one that will run over takes none."""
+    headroom = {provider: max(0, limit - projected) for provider, (projected, limit) in usage.items()}
+    total = sum(headroom.values())
+    if not total:
+        return {provider: 0.0 for provider in usage}
+    return {provider: room / total for provider, room in headroom.items()}
+
+
 class VMServiceTester:
     """Tests VM services by checking if ports are listening"""
     
@@ -260,6 +306,16 @@ class VMServiceTester:
             description="HTTPS proxy via stunnel"
         ))
         
+        # QUIC proxy shares 443 with the HTTPS proxy, over UDP
+        quic_config = variables.get('quic_proxy_config', {})
+        if quic_config and quic_config.get('enable', False):
+            services.append(ServiceConfig(
+                name="QUIC-Proxy",
+                port=443,
+                protocol="udp",
+                description="QUIC proxy via tuic-server"
+            ))
+
         # IPsec VPN
         ipsec_config = variables.get('ipsec_vpn_config', {})
         if ipsec_config and ipsec_config.get('enable', False):
@@ -384,6 +440,44 @@ class VMServiceTester:
             print(f"    Error testing UDP port {port}: {e}")
             return False
     
+    def test_quic_port(self, host: str, port: int, timeout: int = 5) -> bool:
+        """Test for a QUIC server by sending an Initial with an unknown version.
+
+        QUIC servers must answer that with a Version Negotiation packet listing the versions they speak,
+        which proves something QUIC-shaped is listening without needing a QUIC stack or credentials"""
+        try:
+            family = socket.AF_INET6 if ':' in host else socket.AF_INET
+            with socket.socket(family, socket.SOCK_DGRAM) as sock:
+                sock.settimeout(timeout)
+                dcid, scid = os.urandom(8), os.urandom(8)
+                # Long header Initial, reserved "greasing" version 0x?a?a?a?a; padded to the 1200 byte minimum
+                packet = bytes([0xc0]) + bytes.fromhex("1a2a3a4a") + bytes([len(dcid)]) + dcid + bytes([len(scid)]) + scid
+                packet += bytes(1200 - len(packet))
+                sock.sendto(packet, (host, port))
+                data, _ = sock.recvfrom(2048)
+
+            # Version Negotiation: long header bit, version 0, then our SCID/DCID echoed back swapped.
+            # Anything truncated is just not QUIC, so check lengths before indexing
+            if len(data) < 7 or not data[0] & 0x80 or data[1:5] != bytes(4):
+                return False
+            offset = 5
+            dcid_len = data[offset]
+            if data[offset + 1:offset + 1 + dcid_len] != scid:
+                return False
+            offset += 1 + dcid_len
+            if offset >= len(data):
+                return False
+            offset += 1 + data[offset]
+            versions = [data[i:i + 4].hex() for i in range(offset, len(data) - 3, 4)]
+        except socket.timeout:
+            return False
+        except Exception as e:
+            print(f"    Error testing QUIC on port {port}: {e}")
+            return False
+
+        print(f"    QUIC versions offered: {', '.join(versions)}")
+        return "00000001" in versions
+
     def test_icmp_service(self, host: str) -> bool:
         """Test if ICMP (ping) is responding"""
         try:
@@ -406,40 +500,37 @@ class VMServiceTester:
         """Test if a service is running by checking via SSH"""
         if not vm.ssh_private_key:
             return None
-            
+
+        # Check if service is listening on the port
+        if service.protocol in ['tcp', 'udp']:
+            cmd = f"ss -ln{service.protocol[0]} | grep ':{service.port} '"
+        elif service.protocol == 'icmp' and service.name == 'Pingtunnel':
+            # Check if pingtunnel process is running
+            cmd = "pgrep -f pingtunnel"
+        else:
+            return None
+
+        output = self.run_ssh_command(vm, cmd)
+        if output is None:
+            return None
+        return len(output.strip()) > 0
+
+    def run_ssh_command(self, vm: VMInfo, cmd: str) -> Optional[str]:
+        """Run a command on the VM over SSH and return its stdout, or None if SSH isn't available"""
+        ssh_key_path = os.getenv('SSH_PRIVATE_KEY_PATH')
+        if not (ssh_key_path and os.path.exists(ssh_key_path)):
+            return None
         try:
-            # Create SSH client
             ssh = paramiko.SSHClient()
             ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            
-            # Use SSH key from environment or VM info
-            ssh_key_path = os.getenv('SSH_PRIVATE_KEY_PATH')
-            if ssh_key_path and os.path.exists(ssh_key_path):
-                ssh.connect(vm.ip_address, username='clouduser', key_filename=ssh_key_path, timeout=10)
-            else:
-                # Try to use the key from Terraform output (would need to write to temp file)
-                return None
-            
-            # Check if service is listening on the port
-            if service.protocol in ['tcp', 'udp']:
-                cmd = f"ss -ln{service.protocol[0]} | grep ':{service.port} '"
-                stdin, stdout, stderr = ssh.exec_command(cmd)
-                output = stdout.read().decode().strip()
-                ssh.close()
-                return len(output) > 0
-            elif service.protocol == 'icmp' and service.name == 'Pingtunnel':
-                # Check if pingtunnel process is running
-                cmd = "pgrep -f pingtunnel"
-                stdin, stdout, stderr = ssh.exec_command(cmd)
-                output = stdout.read().decode().strip()
-                ssh.close()
-                return len(output) > 0
-                
+            ssh.connect(vm.ip_address, username='clouduser', key_filename=ssh_key_path, timeout=10)
+            stdin, stdout, stderr = ssh.exec_command(cmd)
+            output = stdout.read().decode()
+            ssh.close()
+            return output
         except Exception as e:
-            print(f"    SSH test failed: {e}")
+            print(f"    SSH command failed: {e}")
             return None
-        
-        return None
     
     def test_https_proxy_functional(self, vm: VMInfo) -> bool:
         """Test proxying an HTTPS request through the VM's proxy, verify IP and cert"""
@@ -582,6 +673,162 @@ class VMServiceTester:
             print(f"    [FAIL] Error retrieving or comparing proxy TLS certificate: {e}")
             return False
 
+    def query_each_provider(self, vms: List[VMInfo], query: Callable[[VMInfo], Optional[Any]]) -> Iterator[Tuple[VMInfo, Any]]:
+        """Run an SSH-backed query once per provider, yielding (vm, result) and warning for any without SSH.
+
+        IPv6 entries point at the same VM, so only the first VM of each provider is queried"""
+        seen_providers = set()
+        for vm in vms:
+            if vm.provider in seen_providers:
+                continue
+            seen_providers.add(vm.provider)
+            result = query(vm)
+            if result is None:
+                print(f"  {YELLOW}[WARN] {vm.provider}: SSH not available (set SSH_PRIVATE_KEY_PATH). Skipping.{RESET}")
+                continue
+            yield vm, result
+
+    def read_status_file(self, vm: VMInfo, path: str) -> Optional[Dict[str, str]]:
+        """Read a key=value status file from the VM via SSH. Empty if the file is missing, None if SSH is unavailable"""
+        output = self.run_ssh_command(vm, f"cat {path}")
+        if output is None:
+            return None
+        status = {}
+        for line in output.splitlines():
+            key, sep, value = line.partition("=")
+            if sep:
+                status[key.strip()] = value.strip()
+        return status
+
+    def get_provisioning_status(self, vm: VMInfo) -> Optional[Dict[str, str]]:
+        """Read the provisioning status file the startup script writes"""
+        return self.read_status_file(vm, PROVISION_STATUS_FILE)
+
+    def report_provisioning_status(self, vms: List[VMInfo]):
+        """Print boot-to-ready time, per-stage durations and any services that didn't come up"""
+        print("\nProvisioning")
+        print("-" * 50)
+        for vm, status in self.query_each_provider(vms, self.get_provisioning_status):
+            if not status:
+                print(f"  {YELLOW}[WARN] {vm.provider}: no provisioning status at {PROVISION_STATUS_FILE}{RESET}")
+                continue
+
+            stages = [(k[len("stage-"):-len("-seconds")], int(v)) for k, v in status.items()
+                      if k.startswith("stage-") and k.endswith("-seconds")]
+            if "ready" in status:
+                print(f"  {vm.provider}: {GREEN}ready{RESET} - boot-to-ready {status.get('boot-to-ready-seconds', '?')}s, "
+                      f"provisioning {status.get('provision-seconds', '?')}s")
+            else:
+                last = stages[-1][0] if stages else "none"
+                print(f"  {vm.provider}: {YELLOW}not ready{RESET} (still running or failed; last completed stage: {last})")
+            for name, seconds in sorted(stages, key=lambda s: s[1], reverse=True):
+                print(f"    {name:<12} {seconds:>5}s")
+            for key, value in sorted(status.items()):
+                if key.startswith("service-") and key.endswith("-enable"):
+                    print(f"    {YELLOW}{key[len('service-'):-len('-enable')]} could not be enabled (won't start on reboot){RESET}")
+                elif key.startswith("service-") and value != "active":
+                    print(f"    {RED}{key[len('service-'):]} is {value}{RESET}")
+                elif value.startswith("skipped"):
+                    print(f"    {YELLOW}{key} was {value}{RESET}")
+
+    def get_egress_status(self, vm: VMInfo) -> Optional[Dict[str, str]]:
+        """Read month-to-date egress accounting from the VM. The timer refreshes it every 5 minutes"""
+        return self.read_status_file(vm, EGRESS_STATUS_FILE)
+
+    def report_egress(self, vms: List[VMInfo]):
+        """Print month-to-date and projected egress against each free tier limit, and the suggested traffic split"""
+        print("\nEgress (month to date)")
+        print("-" * 50)
+        usage: Dict[str, Tuple[int, int]] = {}
+        for vm, status in self.query_each_provider(vms, self.get_egress_status):
+            if "egress-bytes" not in status:
+                print(f"  {YELLOW}[WARN] {vm.provider}: no egress accounting at {EGRESS_STATUS_FILE}{RESET}")
+                continue
+
+            used = int(status["egress-bytes"])
+            projected = int(status.get("projected-egress-bytes", used))
+            limit = int(status.get("limit-bytes", 0))
+            age = int(time.time()) - int(status.get("updated-at", 0))
+            if limit:
+                color = RED if projected > limit else YELLOW if projected > 0.9 * limit else GREEN
+                print(f"  {vm.provider}: {format_bytes(used)} of {format_bytes(limit)} used, "
+                      f"projected {color}{format_bytes(projected)} ({100 * projected / limit:.0f}%){RESET} by month end "
+                      f"(sampled {age}s ago)")
+                usage[vm.provider] = (projected, limit)
+            else:
+                print(f"  {vm.provider}: {format_bytes(used)} used, projected {format_bytes(projected)} by month end, no limit set")
+            primary = status.get("primary-interface", "")
+            for key, value in sorted(status.items()):
+                if key.startswith("iface-") and key.endswith("-tx-bytes"):
+                    iface = key[len("iface-"):-len("-tx-bytes")]
+                    rx = int(status.get(f"iface-{iface}-rx-bytes", 0))
+                    label = f"{iface} (primary)" if iface == primary else iface
+                    print(f"    {label:<18} tx {format_bytes(int(value)):>11}  rx {format_bytes(rx):>11}")
+            if limit and projected > limit:
+                print(f"    {RED}[WARN] on track to exceed the free tier egress allowance this month{RESET}")
+
+        if len(usage) > 1:
+            weights = egress_weights(usage)
+            split = ", ".join(f"{provider} {100 * weight:.0f}%" for provider, weight in sorted(weights.items()))
+            print(f"  Suggested traffic split by remaining headroom: {split}")
+
+    def get_wireguard_peer_names(self, vm: VMInfo) -> Dict[str, str]:
+        """Map WireGuard peer public keys to the peer names from Terraform outputs/tfvars"""
+        outputs = self.get_terraform_outputs()
+        wg = (outputs.get(f"{vm.provider}_vm_secrets") or {}).get("wireguard") or {}
+        peers = wg.get("peers") or []
+        if not peers:
+            wg_config = self.get_terraform_variables().get("wireguard_config") or {}
+            peers = wg_config.get("peers") or []
+            if not peers and wg_config.get("client_public_key"):
+                peers = [{"name": "client", "public_key": wg_config["client_public_key"]}]
+        return {p["public_key"]: p["name"] for p in peers if p.get("public_key")}
+
+    def get_wireguard_peer_stats(self, vm: VMInfo) -> Optional[List[WireGuardPeerStats]]:
+        """Read per-peer handshake and transfer counters from wg0 via SSH"""
+        output = self.run_ssh_command(vm, "sudo wg show wg0 dump")
+        if output is None:
+            return None
+        names = self.get_wireguard_peer_names(vm)
+        stats = []
+        # First line describes the interface itself; each following line is one peer:
+        # public-key preshared-key endpoint allowed-ips latest-handshake rx tx keepalive
+        for line in output.strip().splitlines()[1:]:
+            fields = line.split("\t")
+            if len(fields) < 8:
+                continue
+            stats.append(WireGuardPeerStats(
+                name=names.get(fields[0], fields[0][:8] + "..."),
+                public_key=fields[0],
+                endpoint=None if fields[2] == "(none)" else fields[2],
+                allowed_ips=fields[3],
+                latest_handshake=int(fields[4]),
+                rx_bytes=int(fields[5]),
+                tx_bytes=int(fields[6]),
+            ))
+        return stats
+
+    def report_wireguard_peer_stats(self, vms: List[VMInfo]):
+        """Print per-peer handshake age and rx/tx bytes, and each peer's share of the total traffic"""
+        wg_config = self.get_terraform_variables().get("wireguard_config") or {}
+        if not wg_config.get("enable", False):
+            return
+
+        print("\nWireGuard Peer Stats")
+        print("-" * 50)
+        all_stats: List[Tuple[VMInfo, WireGuardPeerStats]] = []
+        for vm, stats in self.query_each_provider(vms, self.get_wireguard_peer_stats):
+            all_stats.extend((vm, peer) for peer in stats)
+
+        total = sum(peer.rx_bytes + peer.tx_bytes for _, peer in all_stats)
+        for vm, peer in all_stats:
+            age = peer.handshake_age
+            age_str = "never" if age is None else f"{age}s ago"
+            peer_total = peer.rx_bytes + peer.tx_bytes
+            share = f"{100 * peer_total / total:.0f}%" if total else "-"
+            print(f"  {vm.provider}/{peer.name} ({peer.allowed_ips}): handshake {age_str}, "
+                  f"rx {format_bytes(peer.rx_bytes)}, tx {format_bytes(peer.tx_bytes)}, share {share}")
+
     def test_vm_services(self, vm: VMInfo) -> Dict[str, bool]:
         """Test all services on a VM in parallel"""
         print(f"\nTesting VM: {vm.provider} ({vm.ip_address})")
@@ -600,7 +847,10 @@ class VMServiceTester:
                 else:
                     success = self.test_tcp_port(vm.ip_address, service.port)
             elif service.protocol == "udp":
-                success = self.test_udp_port(vm.ip_address, service.port)
+                if service.name == "QUIC-Proxy":
+                    success = self.test_quic_port(vm.ip_address, service.port)
+                else:
+                    success = self.test_udp_port(vm.ip_address, service.port)
             elif service.protocol == "icmp":
                 success = self.test_icmp_service(vm.ip_address)
             # If direct port test fails, try SSH-based verification
@@ -644,6 +894,15 @@ class VMServiceTester:
                 results = future.result()
                 all_results[f"{vm.provider}_{vm.ip_address}"] = results
 
+        # Boot-to-ready timings (informational, not counted as pass/fail)
+        self.report_provisioning_status(vms)
+
+        # Egress against the free tier allowances (informational, not counted as pass/fail)
+        self.report_egress(vms)
+
+        # Per-peer WireGuard stats (informational, not counted as pass/fail)
+        self.report_wireguard_peer_stats(vms)
+
         # Run Cloudflare DNS checks (if applicable)
         dns_results = self.test_cloudflare_dns()
         if dns_results:
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+DNS Tunnel Auto-Tuning Probe
+
+Connects to the iodine DNS tunnel on each deployed VM with different settings
+to find what actually works from the current network:
+
+    * whether raw mode (direct UDP to the server) is available
+    * the best working DNS query type and downstream encoding
+    * the largest downstream fragment size iodine can use
+
+It then measures latency and throughput over the tunnel for the winning
+settings and prints the iodine client flags to use.
+
+Usage:
+    sudo python tune_dns_tunnel.py [--provider google|oracle] [--quick]
+
+Requirements:
+    * iodine installed locally (`apt install iodine`), and root to create the tun device
+    * SSH_PRIVATE_KEY_PATH in .env for the throughput test (latency-only otherwise)
+    * DNS_TUNNEL_PASSWORD in .env if the password isn't in the Terraform outputs
+"""
+
+import argparse
+import os
+import queue
+import re
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from test_vm_services import VMServiceTester, GREEN, RED, YELLOW, RESET
+
+import paramiko
+
+
+# Best first. NULL and PRIVATE replies always carry raw binary, so -O (the downstream codec) only
+# applies to the other types, and its Raw codec only to TXT.
+QUERY_TYPES = ["NULL", "PRIVATE", "TXT", "SRV", "MX", "CNAME", "A"]
+ENCODINGS = ["Raw", "Base128", "Base64u", "Base64", "Base32"]
+RAW_REPLY_TYPES = {"NULL", "PRIVATE"}
+RAW_ENCODING_TYPES = {"TXT"}
+
+TUN_DEVICE = "dnstune0"
+
+
+@dataclass
+class TunnelTarget:
+    """A DNS tunnel endpoint to probe"""
+    provider: str
+    domain: str
+    password: str
+
+
+@dataclass
+class ProbeResult:
+    """Outcome of a single iodine connection attempt"""
+    flags: List[str]
+    connected: bool = False
+    raw_mode: bool = False
+    query_type: Optional[str] = None
+    encoding: Optional[str] = None
+    fragsize: Optional[int] = None
+    tunnel_ip: Optional[str] = None
+    latency_ms: Optional[float] = None
+    down_bps: Optional[float] = None
+    up_bps: Optional[float] = None
+    log: List[str] = field(default_factory=list)
+    process: Optional[subprocess.Popen] = field(default=None, repr=False)
+
+    def describe(self) -> str:
+        parts = [
+            f"type={self.query_type or '?'}",
+            f"enc={self.encoding or '?'}",
+            f"frag={self.fragsize or '?'}",
+            f"raw={'yes' if self.raw_mode else 'no'}",
+        ]
+        if self.latency_ms is not None:
+            parts.append(f"rtt={self.latency_ms:.0f}ms")
+        if self.down_bps is not None:
+            parts.append(f"down={self.down_bps / 1024:.1f}KiB/s")
+        if self.up_bps is not None:
+            parts.append(f"up={self.up_bps / 1024:.1f}KiB/s")
+        return " ".join(parts)
+
+
+class DnsTunnelTuner:
+    """Probes iodine settings against a deployed DNS tunnel"""
+
+    def __init__(self, tester: VMServiceTester, timeout: int = 30,
+                 down_bytes: int = 256 * 1024, up_bytes: int = 64 * 1024):
+        self.tester = tester
+        self.timeout = timeout
+        self.down_bytes = down_bytes
+        self.up_bytes = up_bytes
+
+    def discover_targets(self) -> List[TunnelTarget]:
+        """Find DNS tunnel domains and passwords from Terraform outputs/tfvars"""
+        outputs = self.tester.get_terraform_outputs()
+        variables = self.tester.get_terraform_variables()
+        dns_cfg = variables.get("dns_tunnel_config") or {}
+        if not dns_cfg.get("enable", False):
+            return []
+
+        cf_domain = ((variables.get("cloudflare_config") or {}).get("domain") or "").strip()
+        cf_enabled = bool(variables.get("enable_cloudflare", False)) and cf_domain
+        targets = []
+        for provider, label in (("google", "gcp"), ("oracle", "oci")):
+            vm = outputs.get(f"{provider}_vm")
+            if not vm:
+                continue
+            secrets = outputs.get(f"{provider}_vm_secrets") or {}
+            # Mirrors the domain selection in cloud/main.tf
+            domain = (
+                vm.get("dns_tunnel_domain")
+                or (f"ns.{label}.{cf_domain}" if cf_enabled else dns_cfg.get("domain"))
+            )
+            password = (
+                variables.get("dns_tunnel_password")
+                or secrets.get("dns_tunnel_password")
+                or os.getenv("DNS_TUNNEL_PASSWORD")
+            )
+            if not domain or not password:
+                print(f"{YELLOW}[WARN] {provider}: DNS tunnel domain or password not found. Skipping.{RESET}")
+                continue
+            targets.append(TunnelTarget(provider, domain, password))
+        return targets
+
+    # ---------------- iodine handling -----------------
+    def start_iodine(self, target: TunnelTarget, flags: List[str]) -> ProbeResult:
+        """Start iodine in the foreground and wait for it to finish connection setup.
+
+        On success the process is left running (see stop_iodine) so the tunnel can be measured.
+        """
+        result = ProbeResult(flags=flags)
+        cmd = ["iodine", "-f", "-d", TUN_DEVICE, "-P", target.password] + flags + [target.domain]
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        result.process = proc
+
+        lines: "queue.Queue[Optional[str]]" = queue.Queue()
+
+        def reader():
+            for line in proc.stdout:
+                lines.put(line.rstrip())
+            lines.put(None)
+
+        threading.Thread(target=reader, daemon=True).start()
+
+        deadline = time.time() + self.timeout
+        while time.time() < deadline:
+            try:
+                line = lines.get(timeout=max(0.1, deadline - time.time()))
+            except queue.Empty:
+                break
+            if line is None:
+                break
+            result.log.append(line)
+            self.parse_iodine_line(line, result)
+            if "Connection setup complete" in line:
+                result.connected = True
+                return result
+
+        self.stop_iodine(result)
+        return result
+
+    def stop_iodine(self, result: ProbeResult):
+        proc = result.process
+        if proc and proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+
+    @staticmethod
+    def parse_iodine_line(line: str, result: ProbeResult):
+        """Pick the negotiated settings out of iodine's progress output"""
+        m = re.search(r"Server tunnel IP is (\S+)", line)
+        if m:
+            result.tunnel_ip = m.group(1)
+        m = re.search(r"[Uu]sing DNS type (\S+) queries", line)
+        if m:
+            result.query_type = m.group(1)
+        # e.g. "Switching downstream to codec Base128"; not "No alternative downstream codec available"
+        m = re.search(r"(?:to|switched downstream to) codec (\S+)", line, re.IGNORECASE)
+        if m:
+            result.encoding = m.group(1)
+        # e.g. "will use 1186-2=1184", where the usable size is the one after the "="
+        m = re.search(r"will use (\d+)(?:-2=(\d+))?", line)
+        if m:
+            result.fragsize = int(m.group(2) or m.group(1))
+        if "Sending raw traffic directly to" in line:
+            result.raw_mode = True
+
+    def probe(self, target: TunnelTarget, flags: List[str], measure: bool = False) -> ProbeResult:
+        """Connect with the given flags, optionally measure, then tear the tunnel down"""
+        print(f"  iodine {' '.join(flags) or '(defaults)'} ...", end=" ", flush=True)
+        result = self.start_iodine(target, flags)
+        try:
+            if not result.connected:
+                print(f"{RED}failed{RESET}")
+                return result
+            if measure:
+                self.measure(target, result)
+            print(f"{GREEN}ok{RESET} {result.describe()}")
+            return result
+        finally:
+            self.stop_iodine(result)
+
+    # ---------------- measurements -----------------
+    def measure(self, target: TunnelTarget, result: ProbeResult):
+        """Measure latency (TCP connect RTT) and throughput (SSH transfer) across the tunnel"""
+        server_ip = result.tunnel_ip
+        if not server_ip:
+            return
+        # ICMP can't be relied on (pingtunnel turns off echo replies), so time TCP handshakes to sshd
+        rtts = []
+        for _ in range(5):
+            start = time.time()
+            try:
+                with socket.create_connection((server_ip, 22), timeout=10):
+                    rtts.append((time.time() - start) * 1000)
+            except OSError:
+                pass
+        if rtts:
+            result.latency_ms = statistics.median(rtts)
+
+        ssh_key_path = os.getenv("SSH_PRIVATE_KEY_PATH")
+        if not (ssh_key_path and os.path.exists(ssh_key_path)):
+            return
+        try:
+            ssh = paramiko.SSHClient()
+            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            ssh.connect(server_ip, username="clouduser", key_filename=ssh_key_path, timeout=30)
+
+            start = time.time()
+            stdin, stdout, stderr = ssh.exec_command(f"head -c {self.down_bytes} /dev/zero")
+            received = len(stdout.read())
+            result.down_bps = received / max(time.time() - start, 1e-6)
+
+            start = time.time()
+            stdin, stdout, stderr = ssh.exec_command("cat > /dev/null")
+            stdin.write(b"\0" * self.up_bytes)
+            stdin.channel.shutdown_write()
+            stdout.channel.recv_exit_status()
+            result.up_bps = self.up_bytes / max(time.time() - start, 1e-6)
+            ssh.close()
+        except Exception as e:
+            print(f"\n    {YELLOW}[WARN] Throughput test over the tunnel failed: {e}{RESET}")
+
+    # ---------------- tuning -----------------
+    def tune(self, target: TunnelTarget, quick: bool = False) -> Optional[ProbeResult]:
+        """Find the best working settings for one target and return the measured winner"""
+        print(f"\nTuning DNS tunnel: {target.provider} ({target.domain})")
+        print("-" * 50)
+
+        # 1. Let iodine autodetect everything, including whether raw mode works
+        print("Checking raw mode availability:")
+        auto = self.probe(target, [])
+        raw_available = auto.raw_mode
+        if auto.connected and not raw_available:
+            print(f"  {YELLOW}Raw mode not available; the server may be missing its public IP (-n).{RESET}")
+
+        # 2. Best query type that connects (relay mode, so the DNS path itself is tested)
+        print("Probing query types:")
+        query_type = None
+        for qtype in QUERY_TYPES:
+            attempt = self.probe(target, ["-r", "-T", qtype])
+            if attempt.connected:
+                query_type = qtype
+                break
+        if not query_type:
+            print(f"  {RED}No query type could connect. Is the tunnel up and delegated correctly?{RESET}")
+            return None
+
+        # 3. Best downstream encoding for that type, and the fragment size it supports. There's
+        # nothing to choose for NULL/PRIVATE, so keep the query type probe's result
+        best = None
+        if query_type in RAW_REPLY_TYPES:
+            best = attempt
+            best.query_type = query_type
+            best.encoding = "Raw"
+        else:
+            print("Probing downstream encodings:")
+            for enc in ENCODINGS:
+                if enc == "Raw" and query_type not in RAW_ENCODING_TYPES:
+                    continue
+                attempt = self.probe(target, ["-r", "-T", query_type, "-O", enc])
+                if attempt.connected:
+                    attempt.query_type = query_type
+                    attempt.encoding = enc
+                    best = attempt
+                    break
+        if best is None:
+            return None
+
+        # 4. Measure the winner in relay mode and, if possible, raw mode
+        print("Measuring:")
+        base_flags = ["-T", query_type]
+        if query_type not in RAW_REPLY_TYPES:
+            base_flags += ["-O", best.encoding]
+        if best.fragsize:
+            base_flags += ["-m", str(best.fragsize)]
+        candidates = [["-r"] + base_flags]
+        if raw_available and not quick:
+            candidates.append(base_flags)
+
+        measured = []
+        for flags in candidates:
+            res = self.probe(target, flags, measure=True)
+            if res.connected:
+                res.query_type, res.encoding, res.fragsize = query_type, best.encoding, best.fragsize
+                measured.append(res)
+        if not measured:
+            return None
+        # Prefer throughput, then latency
+        return max(measured, key=lambda r: (r.down_bps or 0, -(r.latency_ms or float("inf"))))
+
+    def run(self, provider: Optional[str] = None, quick: bool = False) -> int:
+        print("Free Cloud VPN - DNS Tunnel Auto-Tune")
+        print("=" * 50)
+        if os.geteuid() != 0:
+            print(f"{RED}iodine needs root to create its tun device. Re-run with sudo.{RESET}")
+            return 1
+        if not shutil.which("iodine"):
+            print(f"{RED}iodine not found. Install it with 'apt install iodine'.{RESET}")
+            return 1
+
+        targets = [t for t in self.discover_targets() if provider in (None, t.provider)]
+        if not targets:
+            print("No DNS tunnels found in Terraform state.")
+            return 1
+
+        winners = {}
+        for target in targets:
+            winners[target.provider] = (target, self.tune(target, quick=quick))
+
+        print("\n" + "=" * 50)
+        print("RESULTS")
+        print("=" * 50)
+        rc = 0
+        for name, (target, res) in winners.items():
+            if res is None:
+                print(f"\n{name}: {RED}no working configuration found{RESET}")
+                rc = 1
+                continue
+            print(f"\n{name}: {res.describe()}")
+            print(f"  Client command: iodine -f -P <password> {' '.join(res.flags)} {target.domain}")
+        return rc
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Find the best iodine client settings for the deployed DNS tunnels")
+    parser.add_argument("--provider", choices=["google", "oracle"], help="Only tune this provider's tunnel")
+    parser.add_argument("--quick", action="store_true", help="Skip the raw mode measurement")
+    parser.add_argument("--timeout", type=int, default=30,
+                        help="Seconds to wait for each iodine connection attempt")
+    parser.add_argument("--down-bytes", type=int, default=256 * 1024, help="Bytes to download for the throughput test")
+    parser.add_argument("--up-bytes", type=int, default=64 * 1024, help="Bytes to upload for the throughput test")
+    args = parser.parse_args()
+
+    tuner = DnsTunnelTuner(VMServiceTester(), timeout=args.timeout,
+                           down_bytes=args.down_bytes, up_bytes=args.up_bytes)
+    return tuner.run(provider=args.provider, quick=args.quick)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
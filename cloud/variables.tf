@@ -48,6 +48,19 @@ variable "cloudflare_config" {
   }
 }
 
+variable "egress_steering" {
+  description = "Budget-aware traffic steering: drop a VM from the round-robin apex DNS records when its projected month-end egress reaches threshold x its free tier allowance. Needs the VM to have booted once (it reads usage the VM publishes), so enable it after the first apply. Currently only the Google VM (200GB/month) reports usage to Terraform"
+  type = object({
+    enable    = optional(bool, false)
+    threshold = optional(number, 0.9)
+  })
+  default = {}
+  validation {
+    condition     = var.egress_steering.threshold > 0 && var.egress_steering.threshold <= 1
+    error_message = "threshold must be greater than 0 and at most 1"
+  }
+}
+
 variable "ipv6_enabled" {
   description = "Enable IPv6 for providers that support it (currently Oracle)."
   type        = bool
@@ -167,6 +180,20 @@ variable "https_proxy_secrets" {
   }
 }
 
+variable "quic_proxy_config" {
+  description = "Configuration for the QUIC (TUIC v5) proxy on UDP/443. Shares the HTTPS proxy's certificate and password"
+  type = object({
+    enable             = optional(bool, false)
+    zero_rtt           = optional(bool, true)
+    congestion_control = optional(string, "bbr")
+  })
+  default = {}
+  validation {
+    condition     = contains(["bbr", "cubic", "new_reno"], var.quic_proxy_config.congestion_control)
+    error_message = "congestion_control must be one of bbr, cubic or new_reno"
+  }
+}
+
 variable "ipsec_vpn_config" {
   description = "Configuration for IPSec/IKEv2 VPN"
   type = object({
@@ -210,9 +237,16 @@ variable "wireguard_config" {
   type = object({
     enable             = bool
     port               = optional(number, 51820)
-    client_public_key  = string
+    client_public_key  = optional(string, "")
     client_ip          = optional(string, "172.31.11.2/24")
     client_allowed_ips = optional(string, "0.0.0.0/0")
+    address_pool       = optional(string, "")
+    peers = optional(list(object({
+      name        = string
+      public_key  = string
+      address     = optional(string, "")
+      allowed_ips = optional(string, "0.0.0.0/0")
+    })), [])
   })
   default = {
     enable            = false
@@ -234,6 +268,22 @@ variable "wireguard_config" {
     condition     = can(regex("^([0-9]{1,3}\\.){3}[0-9]{1,3}/[0-9]{1,2}$", var.wireguard_config.client_allowed_ips))
     error_message = "client_allowed_ips must be a valid CIDR notation IP address range"
   }
+  validation {
+    condition     = var.wireguard_config.address_pool == "" || can(cidrhost(var.wireguard_config.address_pool, 0))
+    error_message = "If provided, address_pool must be a valid CIDR range"
+  }
+  validation {
+    condition     = alltrue([for peer in var.wireguard_config.peers : can(regex("^[A-Za-z0-9+/]{43}=$", peer.public_key))])
+    error_message = "Each peer must have a valid base64-encoded public_key"
+  }
+  validation {
+    condition     = alltrue([for peer in var.wireguard_config.peers : peer.address == "" || can(regex("^([0-9]{1,3}\\.){3}[0-9]{1,3}/[0-9]{1,2}$", peer.address))])
+    error_message = "If provided, a peer address must be a valid CIDR notation IP address"
+  }
+  validation {
+    condition     = length(distinct([for peer in var.wireguard_config.peers : peer.name])) == length(var.wireguard_config.peers)
+    error_message = "Peer names must be unique"
+  }
 }
 
 variable "ssh_ports" {